@@ -28,6 +28,7 @@ SOFTWARE.
 
 
 import pyglet, pyray, gc
+import numpy as np
 from typing import Union
 from dataclasses import dataclass
 from sys import argv
@@ -38,7 +39,7 @@ from PIL import ImageTk, Image, ImageDraw, ImageFont
 from tkinter import Tk, Label as TkLabel, BOTH as TkBOTH
 from time import time as gettime, sleep as timesleep
 from json import dumps as jdumps, loads as jloads
-from saoirse_lib import saoirse_lib_version, saoirse_images_path, ThreeDimensionalPosition, logger, expand_full_path, Identifier, MainGameObject, InteractableObject, SpaceGameObject, ThreeDimensionalShape
+from saoirse_lib import saoirse_lib_version, saoirse_images_path, ThreeDimensionalPosition, logger, expand_full_path, Identifier, MainGameObject, InteractableObject, SpaceGameObject, ThreeDimensionalShape, PackedThreeDimensionalShape, ThreeDimensionalInstance, ThreeDimensionalFrustum
 from saoirse_server import saoirse_server_version, SaoirseServer, SaoirseIdentifierEnum
 
 
@@ -359,6 +360,7 @@ class SaoirseClientWidgets:
                 else:
                     self.set_server(server)
                 self.set_player_id(player_id)
+                self.obj_instances = {}
                 self.connect_with_server()
 
             def set_server(self, server: Union[SaoirseServer, None]):
@@ -391,6 +393,13 @@ class SaoirseClientWidgets:
             def get_player_id(self):
                 return self.player_id
 
+            def get_obj_instance(self, obj, obj_model):
+                # Objects keep one instance of their shared model, so static objects don't allocate new geometry each frame
+                obj_instance = self.obj_instances.get(id(obj))
+                if obj_instance is not None and obj_instance[0] is obj:
+                    return obj_instance[1].set_shape(obj_model)
+                return ThreeDimensionalInstance(obj_model)
+
             def get_player_entity(self):
                 if self.get_server() is not None:
                     return self.get_server().get_player_by_id(self.get_player_id())
@@ -414,6 +423,11 @@ class SaoirseClientWidgets:
             def get_dots_per_meter(self):
                 return max(int(((self.get_width()/self.get_fov_x()) + (self.get_height()/self.get_fov_z()))/2), 1)
 
+            def get_view_frustum(self, vx, vy, vz, depth, dots_per_meter):
+                # Matches the projection used to draw the frame: a point shows at x = dots_per_meter*(x-vx)/(y-vy+1),
+                # and likewise for z, so the view's apex sits one meter behind vy and it widens by the screen size per meter of depth
+                return ThreeDimensionalFrustum.of_view(ThreeDimensionalPosition(vx, vy - 1, vz), 0, depth, 0, self.get_width()/dots_per_meter, 0, self.get_height()/dots_per_meter)
+
             def get_current_space(self):
                 player = self.get_player_entity()
                 if player is not None:
@@ -436,25 +450,20 @@ class SaoirseClientWidgets:
                         vy1 = 2
                     else:
                         vy1 = vy
-                    frame_model = ThreeDimensionalShape()
-                    for obj in current_space.get_objects_in_shape(shape=ThreeDimensionalShape.ThreeDimensionalBox.ThreeDimensionalFace(corners=[
-                            ThreeDimensionalPosition(vx - fx, vy, vz + fz), # lft
-                            ThreeDimensionalPosition(vx + fx, vy, vz + fz), # rft
-                            ThreeDimensionalPosition(vx + fx, vy, vz - fz), # rfb
-                            ThreeDimensionalPosition(vx - fx, vy, vz - fz), # lfb
-                            ThreeDimensionalPosition((vx - fx)*fy, vy + fy, (vz + fz)*fy), # lbt
-                            ThreeDimensionalPosition((vx + fx)*fy, vy + fy, (vz + fz)*fy), # rbt
-                            ThreeDimensionalPosition((vx + fx)*fy, vy + fy, (vz - fz)*fy), # rbb
-                            ThreeDimensionalPosition((vx - fx)*fy, vy + fy, (vz - fz)*fy), # lbb
-                            ]
-                    )):
+                    frame_parts = []
+                    obj_instances = {}
+                    dots_per_meter=self.get_dots_per_meter()
+                    for obj in current_space.get_objects_in_frustum(self.get_view_frustum(vx, vy1, vz, fy, dots_per_meter)):
                         if isinstance(obj, SpaceGameObject):
                             obj_model = obj.get_model()
                             if obj_model is not None and isinstance(obj_model, ThreeDimensionalShape):
                                 obj_pos = obj.get_pos()
-                                frame_model.merge(obj_model.copy(), fx+obj_pos.get_x()-vx, obj_pos.get_y()-vy1, fz+obj_pos.get_z()-vz)
-                    frame_model.remove_empty()
-                    dots_per_meter=self.get_dots_per_meter()
+                                obj_instance = self.get_obj_instance(obj, obj_model)
+                                obj_instance.set_offset(fx+obj_pos.get_x()-vx, obj_pos.get_y()-vy1, fz+obj_pos.get_z()-vz)
+                                obj_instances[id(obj)] = (obj, obj_instance)
+                                frame_parts.append(obj_instance)
+                    self.obj_instances = obj_instances
+                    frame_model = PackedThreeDimensionalShape.concat(frame_parts)
                     self.draw_model(frame_model, dots_per_meter=dots_per_meter, cam_pos=ThreeDimensionalPosition(fx, 0, fz), layer=999999, reuse=self.get_id())
 
             def on_removed(self):
@@ -774,19 +783,21 @@ class SaoirseClientRendererPyray(SaoirseClientBaseRenderer):
 
     def draw_model(self, model: ThreeDimensionalShape, x: Union[int, float]=0, y: Union[int, float]=0, z: Union[int, float]=0, dots_per_meter: int=1, cam_pos: ThreeDimensionalPosition=ThreeDimensionalPosition.get_origin(), layer: Union[int, float]=0, reuse: Union[Identifier, None]=None):
         if isinstance(model, ThreeDimensionalShape):
+            model = model.get_packed()
+        if isinstance(model, PackedThreeDimensionalShape):
             meshes = []
             materials = []
-            for face in model.get_faces():
+            for face_i in range(model.get_face_count()):
                 # mesh = pyray.gen_mesh_cube(0, 0, 0)
                 # mesh.vertexCount = len(face.get_edges())
                 # for i, corner in enumerate(face.get_corners()):
                     # for i1, val in enumerate([corner.get_x(), corner.get_y(), corner.get_z()]):
                         # mesh.vertices[i+i1] = val
-                edges = face.get_edges()
-                meshes.append(pyray.Mesh(len(edges), int(len(edges)/3), [pyray.Vector3(corner.get_x(), corner.get_y(), corner.get_z()) for corner in face.get_corners()], None, None, None, None, None, None, None, None, None, None, None, None))
+                face_vertices = model.get_face_vertices(face_i)
+                meshes.append(pyray.Mesh(len(face_vertices), int(len(face_vertices)/3), [pyray.Vector3(float(vx), float(vy), float(vz)) for vx, vy, vz in face_vertices], None, None, None, None, None, None, None, None, None, None, None, None))
                 # meshes.append(mesh)
                 material = pyray.load_material_default()
-                tex = face.get_texture()
+                tex = model.get_face_texture(face_i)
                 if tex is not None:
                     pyray.set_material_texture(material, 1, pyray.load_texture(tex))
                 materials.append(material)
@@ -924,20 +935,19 @@ class SaoirseClientRendererPyglet(SaoirseClientBaseRenderer):
 
     def draw_model(self, model: ThreeDimensionalShape, x: Union[int, float]=0, y: Union[int, float]=0, z: Union[int, float]=0, dots_per_meter: int=1, cam_pos: ThreeDimensionalPosition=ThreeDimensionalPosition.get_origin(), layer: Union[int, float]=0, reuse: Union[Identifier, None]=None):
         if isinstance(model, ThreeDimensionalShape):
+            model = model.get_packed()
+        if isinstance(model, PackedThreeDimensionalShape):
             shader = pyglet.model.get_default_textured_shader()
             dots_per_meter //= 10
             if y == 0:
                 y = 1
             elif y == 1:
                 y = 2
-            for face in model.get_faces():
-                # corners = face.get_corners()
-                corners = []
-                for edge in face.get_edges():
-                    corners.extend(edge)
-                count = len(corners)
+            for face_i in range(model.get_face_count()):
+                face_vertices = model.get_face_vertices(face_i)
+                count = len(face_vertices)
                 if count > 0:
-                    texture = face.get_texture()
+                    texture = model.get_face_texture(face_i)
                     if isinstance(texture, Identifier):
                         texture_name = texture.get_file_path()
                     else:
@@ -948,10 +958,8 @@ class SaoirseClientRendererPyglet(SaoirseClientBaseRenderer):
                         else:
                             texture = pyglet.resource.image(texture_name)
                     if texture is not None:
-                        vertices = []
-                        for corner in corners:
-                            vertices.extend([dots_per_meter*(corner.get_x()), dots_per_meter*(corner.get_z()), dots_per_meter*(corner.get_y())])
-                            # vertices.extend([dots_per_meter*(corner.get_x() + x), dots_per_meter*(corner.get_z() + z), dots_per_meter*(corner.get_y() + y)])
+                        vertices = (dots_per_meter*face_vertices[:, (0, 2, 1)]).ravel().tolist()
+                        # vertices.extend([dots_per_meter*(corner.get_x() + x), dots_per_meter*(corner.get_z() + z), dots_per_meter*(corner.get_y() + y)])
                         #diffuse = [0.5, 0.0, 0.3, 1.0]
                         #ambient = [0.5, 0.0, 0.3, 1.0]
                         #specular = [1.0, 1.0, 1.0, 1.0]
@@ -965,7 +973,7 @@ class SaoirseClientRendererPyglet(SaoirseClientBaseRenderer):
                         # self.render_que.append(group)
                         # self.batch_3d._add_group(group)
                         indices = []
-                        for i in range(1, len(vertices)-2):
+                        for i in range(1, count-1):
                             indices.extend([0, i, i+1])
                         self.render_que.append(shader.vertex_list_indexed(count=count, indices=indices, mode=pyglet.gl.GL_TRIANGLES, batch=self.batch_3d, group=group, vertices=("f", vertices), tex_coords=("f", texture.tex_coords)))
                         # print(shader.vertex_list(count=count, mode=pyglet.gl.GL_LINE_STRIP, batch=self.batch_3d, group=group, vertices=("f", vertices)))
@@ -1099,66 +1107,106 @@ class SaoirseClientRendererPIL(SaoirseClientBaseRenderer):
         }])
         self.img_que[layer] = layer_set
 
+    def get_texture_array(self, tex):
+        # Textures are decoded once and kept as RGBA arrays for sampling
+        if not hasattr(self, "texture_arrays"):
+            self.texture_arrays = {}
+        key = str(tex)
+        tex_array = self.texture_arrays.get(key)
+        if tex_array is None:
+            tex_path = tex.get_file_path() if isinstance(tex, Identifier) else tex
+            if isinstance(tex_path, str) and path.isfile(tex_path):
+                with Image.open(tex_path) as tex_img:
+                    tex_array = np.asarray(tex_img.convert("RGBA"))
+            else:
+                tex_array = np.zeros((1, 1, 4), dtype=np.uint8)
+            self.texture_arrays[key] = tex_array
+        return tex_array
+
+    def rasterize_model(self, model: PackedThreeDimensionalShape, y: Union[int, float]=0, dots_per_meter: int=1, cam_pos: ThreeDimensionalPosition=ThreeDimensionalPosition.get_origin()):
+        # Fills a depth buffer holding 1/depth per pixel, so faces can be drawn in any order and the nearest one wins
+        vertices = model.get_vertices().astype(np.float64)
+        if len(vertices) == 0:
+            return None
+        cy = vertices[:, 1] + y + 1
+        visible = cy > 0
+        safe_cy = np.where(visible, cy, 1)
+        cx = dots_per_meter*((vertices[:, 0]-cam_pos.get_x())/safe_cy)
+        cz = self.get_height() - dots_per_meter*((vertices[:, 2]-cam_pos.get_z())/safe_cy)
+        on_screen = visible & (cx >= 0) & (cz >= 0)
+        if not on_screen.any():
+            return None
+        width = int(min(np.ceil(cx[on_screen].max()), max(self.get_width(), 1))) + 1
+        height = int(min(np.ceil(cz[on_screen].max()), max(self.get_height(), 1))) + 1
+        inverse_depth = np.zeros((height, width), dtype=np.float64)
+        face_ids = np.full((height, width), -1, dtype=np.int32)
+        face_boxes = np.zeros((model.get_face_count(), 4), dtype=np.float64)
+        for face_i in range(model.get_face_count()):
+            face_indices = model.get_face_indices(face_i)
+            if len(face_indices) < 3 or not visible[face_indices].all():
+                continue
+            fx, fz = cx[face_indices], cz[face_indices]
+            face_boxes[face_i] = (fx.min(), fz.min(), max(fx.max() - fx.min(), 1), max(fz.max() - fz.min(), 1))
+            for i in range(1, len(face_indices) - 1):
+                tri = face_indices[[0, i, i + 1]]
+                tx, tz, tw = cx[tri], cz[tri], 1/cy[tri]
+                left, right = max(int(np.floor(tx.min())), 0), min(int(np.ceil(tx.max())), width - 1)
+                top, bottom = max(int(np.floor(tz.min())), 0), min(int(np.ceil(tz.max())), height - 1)
+                area = (tx[1]-tx[0])*(tz[2]-tz[0]) - (tx[2]-tx[0])*(tz[1]-tz[0])
+                if left > right or top > bottom or area == 0:
+                    continue
+                pz, px = np.mgrid[top:bottom + 1, left:right + 1].astype(np.float64)
+                w0 = ((tx[1]-px)*(tz[2]-pz) - (tx[2]-px)*(tz[1]-pz)) / area
+                w1 = ((tx[2]-px)*(tz[0]-pz) - (tx[0]-px)*(tz[2]-pz)) / area
+                w2 = 1 - w0 - w1
+                inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+                # 1/depth is linear across the screen, so it can be interpolated directly
+                depth = w0*tw[0] + w1*tw[1] + w2*tw[2]
+                region_depth = inverse_depth[top:bottom + 1, left:right + 1]
+                nearer = inside & (depth > region_depth)
+                region_depth[nearer] = depth[nearer]
+                face_ids[top:bottom + 1, left:right + 1][nearer] = face_i
+        covered = face_ids >= 0
+        if not covered.any():
+            return None
+        pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        pz, px = np.nonzero(covered)
+        pixel_faces = face_ids[pz, px]
+        pixel_textures = model.get_texture_ids()[pixel_faces]
+        for texture_i, tex in enumerate(model.get_textures()):
+            texture_pixels = pixel_textures == texture_i
+            if not texture_pixels.any():
+                continue
+            tpz, tpx, tfaces = pz[texture_pixels], px[texture_pixels], pixel_faces[texture_pixels]
+            boxes = face_boxes[tfaces]
+            if tex is None:
+                colors = np.zeros((len(tfaces), 4), dtype=np.float64)
+            else:
+                # Each face stretches its texture over its on-screen bounds
+                tex_array = self.get_texture_array(tex)
+                th, tw = tex_array.shape[:2]
+                u = np.clip(((tpx - boxes[:, 0]) / boxes[:, 2] * tw).astype(np.int64), 0, tw - 1)
+                v = np.clip(((tpz - boxes[:, 1]) / boxes[:, 3] * th).astype(np.int64), 0, th - 1)
+                colors = tex_array[v, u].astype(np.float64)
+            _shade = min(5*texture_i, 255)
+            colors[:, :3] = colors[:, :3]*(1 - 25/255) + _shade*(25/255)
+            colors[:, 3] = np.maximum(colors[:, 3], 25)
+            pixels[tpz, tpx] = colors.astype(np.uint8)
+        # Outline pixels where the visible face changes, so hidden edges aren't drawn
+        outline = np.zeros_like(covered)
+        outline[1:, :] |= face_ids[1:, :] != face_ids[:-1, :]
+        outline[:, 1:] |= face_ids[:, 1:] != face_ids[:, :-1]
+        outline &= covered
+        pixels[outline] = (150, 150, 150, 255)
+        return pixels
+
     def get_model_img(self, model: ThreeDimensionalShape, y: Union[int, float]=0, dots_per_meter: int=1, cam_pos: ThreeDimensionalPosition=ThreeDimensionalPosition.get_origin()):
         if isinstance(model, ThreeDimensionalShape):
-            masks = {}
-            model_greatest_x = 1
-            model_greatest_z = 1
-            draw_faces = []
-            for face in model.get_faces():
-                overlaps, remains, draw_faces = face.get_overlaps(draw_faces, cam_pos)
-                if len(remains) > 0:
-                    draw_faces.extend(remains)
-                elif len(overlaps) == 0:
-                    draw_faces.append(face)
-            for draw_face in draw_faces:
-                xz = []
-                greatest_x = 1
-                greatest_z = 1
-                for corner in draw_face.get_corners():
-                    cy = corner.get_y() + y + 1
-                    if cy >= 0:
-                        cx = round(dots_per_meter*((corner.get_x()-cam_pos.get_x())/cy))
-                        cz = self.get_height() - round(dots_per_meter*((corner.get_z()-cam_pos.get_z())/cy))
-                        if cx >= 0 and cz >= 0:
-                            if cx > greatest_x:
-                                greatest_x = cx
-                            if cz > greatest_z:
-                                greatest_z = cz
-                            xz.append((cx, cz))
-                if len(xz) >= 2:
-                    if greatest_x > model_greatest_x:
-                        model_greatest_x = greatest_x
-                    if greatest_z > model_greatest_z:
-                        model_greatest_z = greatest_z
-                    tex = draw_face.get_texture()
-                    key = str(tex)
-                    _, mask_group = masks.get(key, (tex, []))
-                    mask_group.append((xz, (greatest_x, greatest_z)))
-                    masks[key] = (tex, mask_group)
-            if len(masks.values()) > 0 and model_greatest_x > 0 and model_greatest_z > 0:
-                model_img = Image.new(mode="RGBA", size=(int(model_greatest_x), int(model_greatest_z)), color=(0, 0, 0, 0))
-                for i, mask in enumerate(masks.values()):
-                    tex, mask_group = mask
-                    _shade = min(5*i, 255)
-                    shade = (_shade, _shade, _shade, 25)
-                    if isinstance(tex, Identifier):
-                        tex = Image.open(tex.get_file_path())
-                    elif isinstance(tex, str):
-                        tex = Image.open(tex)
-                    for xzs, size in mask_group:
-                        _mask = Image.new(mode="RGBA", size=size, color=(0, 0, 0, 0))
-                        ImageDraw.Draw(im=_mask, mode="RGBA").polygon(xy=xzs, fill=(255, 255, 255, 255))
-                        if tex is not None:
-                            _tex = tex.resize(_mask.size, reducing_gap=3)
-                            model_img.paste(im=_tex, mask=_mask)
-                            _tex.close()
-                        ImageDraw.Draw(im=_mask, mode="RGBA").polygon(xy=xzs, fill=shade, outline=(150, 150, 150, 255), width=2)
-                        model_img.paste(im=_mask, mask=_mask)
-                        _mask.close()
-                    if tex is not None:
-                        tex.close()
-                return model_img
+            model = model.get_packed()
+        if isinstance(model, PackedThreeDimensionalShape):
+            pixels = self.rasterize_model(model, y, dots_per_meter, cam_pos)
+            if pixels is not None:
+                return Image.fromarray(pixels, mode="RGBA")
         else:
             logger.warning(f"Unable to draw {model} as a model as it is not a ThreeDimensionalShape!")
         return None
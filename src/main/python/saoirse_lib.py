@@ -31,8 +31,14 @@ from logging import getLogger
 from typing import Union, Any
 from dataclasses import dataclass
 from os import path as ospath
-from time import sleep
+from time import sleep, time as gettime
 from enum import Enum
+from math import floor, ceil, isfinite
+from heapq import heappush, heappop
+from hashlib import blake2b
+from struct import Struct
+from numbers import Integral, Real
+import numpy as np
 
 
 saoirse_lib_version = "0.0.1"
@@ -62,30 +68,128 @@ def expand_full_path(path_str: str) -> str:
 
 
 class MultiKeyDict(dict):
+    # Tuple keys are also indexed by each of their parts, so d["player"] gives every value whose key contains "player"
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.extmap = {}
+        self.update(*args, **kwargs)
+
+    class SubkeyView():
+        # A live view of the values under a subkey, so lookups don't copy the whole index
+        def __init__(self, mkd, subkey):
+            self.mkd = mkd
+            self.subkey = subkey
+
+        def get_keys(self):
+            return self.mkd.get_subkey_keys(self.subkey)
+
+        def __iter__(self):
+            getter = dict.__getitem__
+            for key in tuple(self.get_keys()):
+                yield getter(self.mkd, key)
+
+        def __len__(self):
+            return len(self.get_keys())
+
+        def __bool__(self):
+            return len(self.get_keys()) > 0
+
+        def __contains__(self, value):
+            return any(value is obj or value == obj for obj in self)
+
+        def __getitem__(self, index):
+            if isinstance(index, slice):
+                return list(self)[index]
+            if index < 0:
+                index += len(self)
+            for i, obj in enumerate(self):
+                if i == index:
+                    return obj
+            raise IndexError(index)
+
+        def __repr__(self):
+            return f"{type(self).__name__}({self.subkey!r}, {list(self)!r})"
+
     def __setitem__(self, __k, __v):
         super().__setitem__(__k, __v)
         if isinstance(__k, (tuple)):
-            if not hasattr(self, "extmap"):
-                self.extmap = {}
+            extmap = self.extmap
             for subkey in __k:
-                subkeymap = self.extmap.get(subkey, [])
-                if __k not in subkeymap:
-                    subkeymap.append(__k)
-                    self.extmap[subkey] = subkeymap
+                subkeymap = extmap.get(subkey)
+                if subkeymap is None:
+                    extmap[subkey] = {__k: None}
+                else:
+                    subkeymap[__k] = None
 
     def __getitem__(self, __k):
-        if __k in self.keys():
+        if super().__contains__(__k):
             return super().__getitem__(__k)
-        elif hasattr(self, "extmap"):
-            if __k in self.extmap.keys():
-                return [self[subkey] for subkey in self.extmap.get(__k, [])]
+        elif __k in self.extmap:
+            return MultiKeyDict.SubkeyView(self, __k)
         return super().__getitem__(__k)
 
     def get(self, __k, __default=None):
-        if (__k in self.keys() or (hasattr(self, "extmap") and __k in self.extmap.keys())):
-            return self[__k]
+        if super().__contains__(__k):
+            return super().__getitem__(__k)
+        elif __k in self.extmap:
+            return MultiKeyDict.SubkeyView(self, __k)
         return __default
 
+    def has_subkey(self, subkey):
+        return subkey in self.extmap
+
+    def get_subkey_keys(self, subkey):
+        return self.extmap.get(subkey, {}).keys()
+
+    def get_subkey_count(self, subkey) -> int:
+        return len(self.extmap.get(subkey, ()))
+
+    def get_subkey_counts(self) -> dict:
+        return {subkey: len(keys) for subkey, keys in self.extmap.items()}
+
+    def remove_subkeys(self, __k):
+        if isinstance(__k, (tuple)):
+            extmap = self.extmap
+            for subkey in __k:
+                subkeymap = extmap.get(subkey)
+                if subkeymap is not None:
+                    subkeymap.pop(__k, None)
+                    if len(subkeymap) == 0:
+                        del extmap[subkey]
+
+    def __delitem__(self, __k):
+        super().__delitem__(__k)
+        self.remove_subkeys(__k)
+
+    def pop(self, __k, *args):
+        if super().__contains__(__k):
+            self.remove_subkeys(__k)
+        return super().pop(__k, *args)
+
+    def popitem(self):
+        item = super().popitem()
+        self.remove_subkeys(item[0])
+        return item
+
+    def setdefault(self, __k, __default=None):
+        if not super().__contains__(__k):
+            self[__k] = __default
+        return super().__getitem__(__k)
+
+    def update(self, *args, **kwargs):
+        for __k, __v in dict(*args, **kwargs).items():
+            self[__k] = __v
+
+    def clear(self):
+        super().clear()
+        self.extmap.clear()
+
+    def copy(self):
+        return MultiKeyDict(self)
+
+    def __reduce__(self):
+        return (MultiKeyDict, (dict(self),))
+
 
 class Identifier():
     def __init__(self, path: Union[str, list]="", delimiter: str=":", constant: bool=False):
@@ -180,20 +284,105 @@ class Identifier():
             return ide
         return None
 
+    def intern(ide: Union[str, list, Any], delimiter: str=":") -> Union[Any, None]:
+        return InternedIdentifier.of(ide, delimiter)
+
 
-saoirse_resources_path = Identifier(["resources", saoirse_id], constant=True)
+class InternedIdentifier(Identifier):
+    # Immutable, shared Identifiers: one instance per path, with the path string and hash worked out once
+    # Only these are hashable, plain Identifiers can change their path while used as keys
+    interned = {}
+
+    def __init__(self, path: list, delimiter: str=":"):
+        self.constant = True
+        self.delimiter = delimiter
+        self.path = tuple(path)
+        self.path_str = delimiter.join(path)
+        self.path_hash = hash(self.path)
+        self.file_path = ospath.join(*path) if len(path) > 0 else ""
+
+    def of(ide: Union[str, list, Identifier], delimiter: str=":"):
+        if isinstance(ide, InternedIdentifier):
+            return ide
+        if isinstance(ide, Identifier):
+            path = ide.get_path().copy()
+            delimiter = ide.get_delimiter()
+        elif isinstance(ide, (str, list)):
+            path = Identifier(ide.copy() if isinstance(ide, list) else ide, delimiter).get_path()
+        else:
+            return None
+        key = (tuple(path), delimiter)
+        interned = InternedIdentifier.interned.get(key)
+        if interned is None:
+            interned = InternedIdentifier(path, delimiter)
+            InternedIdentifier.interned[key] = interned
+        return interned
+
+    def set_path(self, new_path_in: Union[str, list], update_self: bool=True):
+        return InternedIdentifier.of(new_path_in, self.get_delimiter())
+
+    def set_delimiter(self, new_delimiter_in: str, update_self: bool=True):
+        return InternedIdentifier.of(self.get_path(), new_delimiter_in if isinstance(new_delimiter_in, str) else "/")
+
+    def get_path(self) -> list:
+        # A copy, so the shared instance can't be changed through it
+        return list(self.path)
+
+    def get_path_str(self) -> str:
+        return self.path_str
+
+    def get_file_path(self) -> str:
+        return self.file_path
+
+    def is_equal(self, other_in) -> bool:
+        return other_in is self or (isinstance(other_in, Identifier) and tuple(other_in.path) == self.path)
+
+    def __eq__(self, other_in):
+        return self.is_equal(other_in)
+
+    def __hash__(self):
+        return self.path_hash
+
+    def append(self, other_path_in: Union[str, list], update_self: Union[bool, None]=None):
+        new_path = self.get_path()
+        if isinstance(other_path_in, list):
+            new_path.extend(other_path_in)
+        elif isinstance(other_path_in, str):
+            new_path.append(other_path_in)
+        else:
+            logger.warning(f"Failed to append invalid path {other_path_in} to identifier {self} as it is not of type list or str!")
+        return InternedIdentifier.of(new_path, self.get_delimiter())
+
+    def extend(self, other_in, update_self: Union[bool, None]=None):
+        if isinstance(other_in, Identifier):
+            return InternedIdentifier.of(self.get_path() + other_in.get_path(), self.get_delimiter())
+
+    def copy(self):
+        return self
+
+
+saoirse_resources_path = Identifier.intern(["resources", saoirse_id])
 saoirse_media_path = saoirse_resources_path.append("media")
 saoirse_images_path = saoirse_media_path.append("images")
 saoirse_missing_image_path = saoirse_images_path.append("missing.png")
 saoirse_audio_path = saoirse_media_path.append("audio")
 
 
+identifier_enum_cache = {}
+model_cache = {}
+model_bounds_cache = {}
+
+
 class IdentifierEnum(Enum):
     def get_base_ide(self) -> Identifier:
         return Identifier()
 
     def get_identifier(self) -> Identifier:
-        return self.get_base_ide().extend(Identifier.get_id_from_str_list_or_id(self.value), False)
+        ide = identifier_enum_cache.get(self)
+        if ide is None:
+            ide = Identifier.intern(self.get_base_ide().extend(Identifier.get_id_from_str_list_or_id(self.value), False))
+            identifier_enum_cache[self] = ide
+        return ide
 
 
 class IdentifierObjGetterPair():
@@ -234,6 +423,42 @@ class IdentifierObjGetterPair():
 class BaseRegistry():
     def __init__(self):
         self.entries = {}
+        self.entry_trie = BaseRegistry.TrieNode()
+
+    class TrieNode():
+        # One node per Identifier path part, so "items:saoirse:oak" sits under "items" -> "saoirse" -> "oak"
+        def __init__(self):
+            self.children = {}
+            self.entry_key = None
+
+        def get_child(self, part):
+            return self.children.get(part)
+
+        def get_or_add_child(self, part):
+            child = self.children.get(part)
+            if child is None:
+                child = BaseRegistry.TrieNode()
+                self.children[part] = child
+            return child
+
+        def iter_entry_keys(self):
+            stack = [self]
+            while len(stack) > 0:
+                node = stack.pop()
+                if node.entry_key is not None:
+                    yield node.entry_key
+                stack.extend(reversed(node.children.values()))
+
+    def get_entry_trie(self):
+        return self.entry_trie
+
+    def get_trie_node(self, path):
+        node = self.get_entry_trie()
+        for part in path:
+            node = node.get_child(part)
+            if node is None:
+                return None
+        return node
 
     def get_entries_dict(self):
         return self.entries
@@ -243,18 +468,41 @@ class BaseRegistry():
 
     def get_entry(self, id_in):
         ide = Identifier.get_id_from_str_list_or_id(id_in)
+        if ide is None:
+            return None
+        return self.entries.get(ide.get_path_str())
+
+    def iter_entry_keys_under_category(self, category_id, exact_prefix=True):
+        ide = Identifier.get_id_from_str_list_or_id(category_id)
+        if ide is None:
+            return
+        path = [part for part in ide.get_path() if part != ""]
+        if exact_prefix or len(path) == 0:
+            node = self.get_trie_node(path)
+            if node is not None:
+                yield from node.iter_entry_keys()
+        else:
+            # Matches the last part as a plain string prefix, like "items:saoirse:oak" matching "items:saoirse:oak_stick"
+            node = self.get_trie_node(path[:-1])
+            if node is not None:
+                for part, child in node.children.items():
+                    if part.startswith(path[-1]):
+                        yield from child.iter_entry_keys()
 
-        if self.contains_id(ide):
-            return self.entries[ide.get_path_str()]
-        return None
+    def iter_entries_under_category(self, category_id, exact_prefix=True):
+        entries = self.get_entries_dict()
+        for key in self.iter_entry_keys_under_category(category_id, exact_prefix):
+            yield entries[key]
+
+    def get_entries_under_category(self, category_id, exact_prefix=True):
+        entries = self.get_entries_dict()
+        return {key: entries[key] for key in self.iter_entry_keys_under_category(category_id, exact_prefix)}
 
-    def get_entries_under_category(self, category_id):
-        category_entries = {}
-        category_key = category_id.get_path_str()
-        for key, obj in self.get_entries_dict().items():
-            if key.startswith(category_key):
-                category_entries[key] = obj
-        return category_entries
+    def get_namespaces(self):
+        return self.get_entry_trie().children.keys()
+
+    def iter_namespace(self, namespace):
+        return self.iter_entries_under_category(Identifier([namespace]))
 
     def contains_id(self, id_in):
         ide = Identifier.get_id_from_str_list_or_id(id_in)
@@ -273,15 +521,98 @@ class BaseRegistry():
                 if id_str in self.get_entries_dict().keys():
                     logger.warning(msg=f"Failed to register {id_obj_pair} as its id of {id_str} is alread registered!")
                 else:
-                    id_obj_pair.set_id(ide)
+                    id_obj_pair.set_id(Identifier.intern(ide))
                     self.entries[id_str] = id_obj_pair
+                    node = self.get_entry_trie()
+                    for part in ide.get_path():
+                        node = node.get_or_add_child(part)
+                    node.entry_key = id_str
             else:
                 logger.warning(msg=f"Failed to register {id_obj_pair} as its id of {ide} is not an Identifier!")
         else:
             logger.warning(msg=f"Failed to register {id_obj_pair} as it is not an IdentifierObjectPair!")
 
 
+class ThreeDimensionalVector(tuple):
+    # A hashable, immutable (x, y, z) that costs no more than a plain tuple
+    __slots__ = ()
+
+    def __new__(cls, x=0, y=0, z=0):
+        return tuple.__new__(cls, (x, y, z))
+
+    def of_position(pos):
+        return ThreeDimensionalVector(pos.get_x(), pos.get_y(), pos.get_z())
+
+    def get_x(self):
+        return self[0]
+
+    def get_y(self):
+        return self[1]
+
+    def get_z(self):
+        return self[2]
+
+    def __add__(self, other):
+        return ThreeDimensionalVector(self[0] + other.get_x(), self[1] + other.get_y(), self[2] + other.get_z())
+
+    def __sub__(self, other):
+        return ThreeDimensionalVector(self[0] - other.get_x(), self[1] - other.get_y(), self[2] - other.get_z())
+
+    def __mul__(self, scalar):
+        return ThreeDimensionalVector(self[0] * scalar, self[1] * scalar, self[2] * scalar)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return ThreeDimensionalVector(self[0] / scalar, self[1] / scalar, self[2] / scalar)
+
+    def __neg__(self):
+        return ThreeDimensionalVector(-self[0], -self[1], -self[2])
+
+    def dot(self, other):
+        return self[0] * other.get_x() + self[1] * other.get_y() + self[2] * other.get_z()
+
+    def cross(self, other):
+        ox, oy, oz = other.get_x(), other.get_y(), other.get_z()
+        return ThreeDimensionalVector(self[1] * oz - self[2] * oy, self[2] * ox - self[0] * oz, self[0] * oy - self[1] * ox)
+
+    def length(self):
+        return (self[0]**2 + self[1]**2 + self[2]**2)**0.5
+
+    def normalized(self):
+        length = self.length()
+        if length == 0:
+            return self
+        return self / length
+
+    def to_position(self):
+        return ThreeDimensionalPosition(self[0], self[1], self[2])
+
+    def trace(self, other, resolution=1):
+        # Evenly spaced points no more than resolution apart on the line from self to other, with both ends included
+        line = other - self
+        length = line.length()
+        points = [self]
+        if length > 0:
+            steps = ceil(length / resolution)
+            step = line / steps
+            for i in range(1, steps):
+                points.append(self + step * i)
+            points.append(other)
+        return points
+
+    def offset_all(vectors: list, x=0, y=0, z=0) -> list:
+        for i, vector in enumerate(vectors):
+            vectors[i] = ThreeDimensionalVector(vector[0] + x, vector[1] + y, vector[2] + z)
+        return vectors
+
+    def __str__(self):
+        return f"x{self[0]}y{self[1]}z{self[2]}"
+
+
 class ThreeDimensionalPosition():
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x=0, y=0, z=0):
         self.x = x
         self.y = y
@@ -309,7 +640,7 @@ class ThreeDimensionalPosition():
         return self.z
 
     def get_distance_from_other(self, other):
-        return ((self.get_x() + other.get_x())**2 + (self.get_y() + other.get_y())**2 + (self.get_z() + other.get_z())**2)**0.5
+        return ((self.get_x() - other.get_x())**2 + (self.get_y() - other.get_y())**2 + (self.get_z() - other.get_z())**2)**0.5
 
     def get_distance_two_1d_points(primary, secondary):
         return secondary - primary
@@ -374,27 +705,11 @@ class ThreeDimensionalPosition():
             return ThreeDimensionalPosition(new_x, new_y, new_z)
 
     def offset_direction(self, direction, distance):
-        if direction == ThreeDimensionalPosition.Direction.UP:
-            return ThreeDimensionalPosition(self.get_x(), self.get_y(), self.get_z() + distance)
-
-        elif direction == ThreeDimensionalPosition.Direction.DOWN:
-            return ThreeDimensionalPosition(self.get_x(), self.get_y(), self.get_z() - distance)
-
-        elif direction == ThreeDimensionalPosition.Direction.FRONT:
-            return ThreeDimensionalPosition(self.get_x(), self.get_y() + distance, self.get_z())
-
-        elif direction == ThreeDimensionalPosition.Direction.BACK:
-            return ThreeDimensionalPosition(self.get_x(), self.get_y() - distance, self.get_z())
-
-        elif direction == ThreeDimensionalPosition.Direction.RIGHT:
-            return ThreeDimensionalPosition(self.get_x() + distance, self.get_y(), self.get_z())
-
-        elif direction == ThreeDimensionalPosition.Direction.LEFT:
-            return ThreeDimensionalPosition(self.get_x() - distance, self.get_y(), self.get_z())
-
-        else:
+        unit = ThreeDimensionalPosition.direction_units.get(direction)
+        if unit is None:
             logger.warning(f"Could not get offset of ThreeDimensionalPosition by direction {direction} because it is not a Direction!")
             return self
+        return ThreeDimensionalPosition(self.x + unit[0] * distance, self.y + unit[1] * distance, self.z + unit[2] * distance)
 
     def get_intersection(edge, edge1, allow_edges=True):
         intersection = ThreeDimensionalPosition(
@@ -409,20 +724,17 @@ class ThreeDimensionalPosition():
 
 
     def get_relative(self, other):
-        return ThreeDimensionalPosition(self.get_x() + other.get_x(), self.get_y() + other.get_y(), self.get_z() + other.get_z())
+        return ThreeDimensionalPosition(self.x + other.get_x(), self.y + other.get_y(), self.z + other.get_z())
 
     def approach(self, other, distance):
         steps = self.get_distance_from_other(other) / distance
         return self.get_relative(ThreeDimensionalPosition(self.get_distance_from_other_x(other) / steps, self.get_distance_from_other_y(other) / steps, self.get_distance_from_other_z(other) / steps))
 
     def trace(self, other, resolution=1):
-        positions = [self]
-        pos = self.approach(other, distance=resolution)
-        while pos.get_distance_from_other(other) < resolution * 2:
-            positions.append(pos)
-            pos = pos.approach(other, distance=resolution)
-        positions.append(other)
-        return positions
+        points = self.to_vector().trace(other.to_vector(), resolution)
+        if len(points) == 1:
+            return [self]
+        return [self] + [point.to_position() for point in points[1:-1]] + [other]
 
     def get_nearest_direction_to_other_pos(self, other):
         dist_x = self.get_distance_from_other_x(other)
@@ -484,7 +796,36 @@ class ThreeDimensionalPosition():
         Z = "z"
 
     def copy(self):
-        return ThreeDimensionalPosition(self.get_x(), self.get_y(), self.get_z())
+        return ThreeDimensionalPosition(self.x, self.y, self.z)
+
+    def to_vector(self):
+        return ThreeDimensionalVector(self.x, self.y, self.z)
+
+    def __add__(self, other):
+        return ThreeDimensionalPosition(self.x + other.get_x(), self.y + other.get_y(), self.z + other.get_z())
+
+    def __sub__(self, other):
+        return ThreeDimensionalPosition(self.x - other.get_x(), self.y - other.get_y(), self.z - other.get_z())
+
+    def __mul__(self, scalar):
+        return ThreeDimensionalPosition(self.x * scalar, self.y * scalar, self.z * scalar)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return ThreeDimensionalPosition(self.x / scalar, self.y / scalar, self.z / scalar)
+
+    def __neg__(self):
+        return ThreeDimensionalPosition(-self.x, -self.y, -self.z)
+
+    def dot(self, other):
+        return self.x * other.get_x() + self.y * other.get_y() + self.z * other.get_z()
+
+    def cross(self, other):
+        return self.to_vector().cross(other).to_position()
+
+    def length(self):
+        return (self.x**2 + self.y**2 + self.z**2)**0.5
 
     def to_dict(self):
         return {ThreeDimensionalPosition.Axies.X.value: self.get_x(), ThreeDimensionalPosition.Axies.Y.value: self.get_y(), ThreeDimensionalPosition.Axies.Z.value: self.get_z()}
@@ -505,7 +846,24 @@ class ThreeDimensionalPosition():
         return self.to_str()
 
     def __eq__(self, other):
-        return self.get_x() == other.get_x() and self.get_y() == other.get_y() and self.get_z() == other.get_z()
+        if isinstance(other, ThreeDimensionalPosition):
+            return self.x == other.x and self.y == other.y and self.z == other.z
+        elif isinstance(other, ThreeDimensionalVector):
+            return self.x == other[0] and self.y == other[1] and self.z == other[2]
+        return False
+
+    # Positions are mutable, so they aren't hashable, key by to_vector() instead
+    __hash__ = None
+
+
+ThreeDimensionalPosition.direction_units = {
+    ThreeDimensionalPosition.Direction.UP: (0, 0, 1),
+    ThreeDimensionalPosition.Direction.DOWN: (0, 0, -1),
+    ThreeDimensionalPosition.Direction.FRONT: (0, 1, 0),
+    ThreeDimensionalPosition.Direction.BACK: (0, -1, 0),
+    ThreeDimensionalPosition.Direction.RIGHT: (1, 0, 0),
+    ThreeDimensionalPosition.Direction.LEFT: (-1, 0, 0),
+}
 
 
 class ActionIds(Enum):
@@ -553,6 +911,176 @@ class SaveableObject():
         return False
 
 
+class BinaryCodec():
+    # Compact tagged encoding for save data: a header with the schema version, a table of every string used,
+    # then the data itself, where strings are table indices, ints are varints and position dicts are three packed doubles
+    magic = b"SBIN"
+    schema_version = 1
+    header_struct = Struct("<4sH")
+    double_struct = Struct("<d")
+    position_struct = Struct("<3d")
+    position_keys = ("x", "y", "z")
+
+    class Tags:
+        NONE = 0
+        FALSE = 1
+        TRUE = 2
+        INT = 3
+        FLOAT = 4
+        STR = 5
+        BYTES = 6
+        LIST = 7
+        TUPLE = 8
+        DICT = 9
+        POSITION = 10
+
+    class SchemaVersionError(ValueError):
+        # Raised for data written with another schema version, there are no migrations between versions yet
+        pass
+
+    def get_schema_version(raw):
+        magic, version = BinaryCodec.header_struct.unpack_from(raw, 0)
+        if magic != BinaryCodec.magic:
+            raise ValueError("Data is not in the binary save format")
+        return version
+
+    def encode(data):
+        tags = BinaryCodec.Tags
+        strings = {}
+        body = bytearray()
+
+        def write_uint(n, out=body):
+            while n > 0x7f:
+                out.append((n & 0x7f) | 0x80)
+                n >>= 7
+            out.append(n)
+
+        def write_str(value):
+            index = strings.get(value)
+            if index is None:
+                index = len(strings)
+                strings[value] = index
+            write_uint(index)
+
+        def write(value):
+            if value is None:
+                body.append(tags.NONE)
+            elif value is True:
+                body.append(tags.TRUE)
+            elif value is False:
+                body.append(tags.FALSE)
+            elif isinstance(value, str):
+                body.append(tags.STR)
+                write_str(value)
+            elif isinstance(value, Integral):
+                value = int(value)
+                body.append(tags.INT)
+                write_uint(value << 1 if value >= 0 else ((-value) << 1) - 1)
+            elif isinstance(value, Real):
+                body.append(tags.FLOAT)
+                body.extend(BinaryCodec.double_struct.pack(value))
+            elif isinstance(value, dict):
+                if len(value) == 3 and all(isinstance(value.get(key), float) for key in BinaryCodec.position_keys):
+                    body.append(tags.POSITION)
+                    body.extend(BinaryCodec.position_struct.pack(*(value[key] for key in BinaryCodec.position_keys)))
+                else:
+                    body.append(tags.DICT)
+                    write_uint(len(value))
+                    for key, item in value.items():
+                        write(key)
+                        write(item)
+            elif isinstance(value, (list, tuple)):
+                body.append(tags.TUPLE if isinstance(value, tuple) else tags.LIST)
+                write_uint(len(value))
+                for item in value:
+                    write(item)
+            elif isinstance(value, (bytes, bytearray)):
+                body.append(tags.BYTES)
+                write_uint(len(value))
+                body.extend(value)
+            else:
+                raise TypeError(f"Can't encode {type(value).__name__} values in the binary save format")
+
+        write(data)
+        # The string table goes before the data so that strings are known when reading it
+        out = bytearray(BinaryCodec.header_struct.pack(BinaryCodec.magic, BinaryCodec.schema_version))
+        write_uint(len(strings), out)
+        for value in strings.keys():
+            encoded = value.encode()
+            write_uint(len(encoded), out)
+            out.extend(encoded)
+        out.extend(body)
+        return bytes(out)
+
+    def decode(raw):
+        version = BinaryCodec.get_schema_version(raw)
+        if version != BinaryCodec.schema_version:
+            raise BinaryCodec.SchemaVersionError(f"Data was saved with binary schema version {version}, but only version {BinaryCodec.schema_version} can be read")
+        tags = BinaryCodec.Tags
+        raw = memoryview(raw)
+        pos = BinaryCodec.header_struct.size
+
+        def read_uint():
+            nonlocal pos
+            n = 0
+            shift = 0
+            while True:
+                byte = raw[pos]
+                pos += 1
+                n |= (byte & 0x7f) << shift
+                if byte < 0x80:
+                    return n
+                shift += 7
+
+        strings = []
+        for i in range(read_uint()):
+            length = read_uint()
+            strings.append(str(raw[pos:pos + length], "utf-8"))
+            pos += length
+
+        def read():
+            nonlocal pos
+            tag = raw[pos]
+            pos += 1
+            if tag == tags.NONE:
+                return None
+            elif tag == tags.TRUE:
+                return True
+            elif tag == tags.FALSE:
+                return False
+            elif tag == tags.STR:
+                return strings[read_uint()]
+            elif tag == tags.INT:
+                n = read_uint()
+                return n >> 1 if n & 1 == 0 else -((n + 1) >> 1)
+            elif tag == tags.FLOAT:
+                value = BinaryCodec.double_struct.unpack_from(raw, pos)[0]
+                pos += BinaryCodec.double_struct.size
+                return value
+            elif tag == tags.POSITION:
+                values = BinaryCodec.position_struct.unpack_from(raw, pos)
+                pos += BinaryCodec.position_struct.size
+                return dict(zip(BinaryCodec.position_keys, values))
+            elif tag == tags.DICT:
+                value = {}
+                for i in range(read_uint()):
+                    key = read()
+                    value[key] = read()
+                return value
+            elif tag == tags.LIST:
+                return [read() for i in range(read_uint())]
+            elif tag == tags.TUPLE:
+                return tuple(read() for i in range(read_uint()))
+            elif tag == tags.BYTES:
+                length = read_uint()
+                value = bytes(raw[pos:pos + length])
+                pos += length
+                return value
+            raise ValueError(f"Unknown tag {tag} in binary save data")
+
+        return read()
+
+
 class InteractableObject():
     def get_action_by_id(self, ide, actor):
         return None
@@ -598,14 +1126,18 @@ class ThreeDimensionalCornerHolder():
 
     def get_corners(self) -> list:
         corners = []
+        seen = set()
         for face in self.get_faces():
             for corner in face.get_corners():
-                if corner not in corners:
+                point = corner.to_vector()
+                if point not in seen:
+                    seen.add(point)
                     corners.append(corner)
         return corners
 
     def get_edges(self) -> list:
         edges = []
+        corners = None
         for face in self.get_faces():
             edge = []
             for corner in face.get_corners():
@@ -613,29 +1145,148 @@ class ThreeDimensionalCornerHolder():
                 if len(edge) > 1:
                     edges.append(edge)
                     edge = [corner]
-            if len(edge) == 1 and len(self.get_corners()) > 1:
-                edge.append(self.get_corners()[0])
-                edges.append(edge)
+            if len(edge) == 1:
+                if corners is None:
+                    corners = self.get_corners()
+                if len(corners) > 1:
+                    edge.append(corners[0])
+                    edges.append(edge)
         return edges
 
+    def get_hull_slabs(self) -> Union[tuple, None]:
+        # The convex hull of the corners is where every slab holds, lo <= normal . point <= hi.
+        # Facet normals come from corner triples, and edge normals within flat or line-shaped hulls come from crossing
+        # corner pairs with those and the axes, so boxes squashed into a face, an edge or a point still fill correctly.
+        corners = np.array([(corner.get_x(), corner.get_y(), corner.get_z()) for corner in self.get_corners()], dtype=np.float64)
+        if len(corners) == 0:
+            return None
+        count = len(corners)
+        axes = np.eye(3)
+        i, j = np.triu_indices(count, 1)
+        pair_dirs = corners[j] - corners[i]
+        a, b, c = np.array([(a, b, c) for a in range(count) for b in range(a + 1, count) for c in range(b + 1, count)], dtype=np.int64).reshape(-1, 3).T
+        triple_normals = np.cross(corners[b] - corners[a], corners[c] - corners[a])
+        base_normals = np.concatenate([triple_normals, axes])
+        edge_normals = np.cross(pair_dirs[:, None, :], base_normals[None, :, :]).reshape(-1, 3)
+        normals = np.concatenate([axes, triple_normals, edge_normals])
+        lengths = np.linalg.norm(normals, axis=1)
+        scale = max(float(np.abs(corners).max()), 1.0)
+        normals = normals[lengths > 1e-12 * scale * scale]
+        normals /= np.linalg.norm(normals, axis=1)[:, None]
+        # A normal and its opposite make the same slab, so keep one of each before dropping duplicates
+        first = np.argmax(np.abs(normals) > 1e-9, axis=1)
+        normals *= np.where(normals[np.arange(len(normals)), first] < 0, -1, 1)[:, None]
+        normals = np.unique(np.round(normals, 9), axis=0)
+        projections = corners @ normals.T
+        return (normals, projections.min(axis=0), projections.max(axis=0))
+
+    def voxelize_grid(self, resolution=1):
+        # Returns the index of the lowest grid point and a boolean grid with True for every point resolution apart inside the hull
+        slabs = self.get_hull_slabs()
+        if slabs is None:
+            return (np.zeros(3, dtype=np.int64), np.zeros((0, 0, 0), dtype=bool))
+        normals, lo, hi = slabs
+        bounds = self.get_bounds()
+        tolerance = 1e-9 * max(max(abs(bound) for bound in bounds), resolution)
+        start = np.ceil((np.array(bounds[:3]) - tolerance) / resolution).astype(np.int64)
+        stop = np.floor((np.array(bounds[3:]) + tolerance) / resolution).astype(np.int64)
+        size = np.maximum(stop - start + 1, 0)
+        grid = np.zeros(tuple(size), dtype=bool)
+        if size.min() == 0:
+            return (start, grid)
+        ys, zs = np.meshgrid((start[1] + np.arange(size[1])) * resolution, (start[2] + np.arange(size[2])) * resolution, indexing="ij")
+        layer_projections = ys[..., None] * normals[:, 1] + zs[..., None] * normals[:, 2]
+        lo = lo - tolerance
+        hi = hi + tolerance
+        # One x layer at a time keeps the temporary arrays to a single slice of the grid
+        for ix in range(size[0]):
+            projections = layer_projections + (start[0] + ix) * resolution * normals[:, 0]
+            grid[ix] = np.all((projections >= lo) & (projections <= hi), axis=-1)
+        return (start, grid)
+
+    def voxelize(self, resolution=1):
+        start, grid = self.voxelize_grid(resolution)
+        return np.argwhere(grid) + start
+
+    def voxels_to_positions(voxels, resolution=1) -> list:
+        return [ThreeDimensionalPosition(x, y, z) for x, y, z in (voxels * resolution).tolist()]
+
+    def get_containment_bounds(self) -> Union[tuple, None]:
+        # A point is inside when it lies between the ends of every edge on every axis,
+        # which is the same as lying between the highest edge minimum and the lowest edge maximum
+        edges = self.get_edges()
+        if len(edges) == 0:
+            return None
+        ends = np.array([[(corner.get_x(), corner.get_y(), corner.get_z()) for corner in edge] for edge in edges], dtype=np.float64)
+        return (ends.min(axis=1).max(axis=0), ends.max(axis=1).min(axis=0))
+
+    def contains_points(self, points, allow_edges: bool=True):
+        if not isinstance(points, np.ndarray):
+            points = np.array([(point.get_x(), point.get_y(), point.get_z()) if hasattr(point, "get_x") else point for point in points], dtype=np.float64)
+        points = points.reshape(-1, 3)
+        bounds = self.get_containment_bounds()
+        if bounds is None:
+            return np.zeros(len(points), dtype=bool)
+        lo, hi = bounds
+        if allow_edges:
+            return np.all((points >= lo) & (points <= hi), axis=1)
+        return np.all((points > lo) & (points < hi), axis=1)
+
+    def get_bounds(self) -> Union[tuple, None]:
+        corners = self.get_corners()
+        if len(corners) == 0:
+            return None
+        xs = [corner.get_x() for corner in corners]
+        ys = [corner.get_y() for corner in corners]
+        zs = [corner.get_z() for corner in corners]
+        return (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
+
     def is_inside_shape(self, shape, allow_edges: bool=True) -> bool:
         if isinstance(shape, (ThreeDimensionalShape, ThreeDimensionalShape.ThreeDimensionalBox, ThreeDimensionalShape.ThreeDimensionalBox.ThreeDimensionalFace)):
-            return all(corner.is_inside_shape(shape, allow_edges) for corner in self.get_corners())
+            return bool(shape.contains_points(self.get_corners(), allow_edges).all())
         else:
             logger.warning(f"Could not determine if {self} is inside shape {shape} because it is not of type ThreeDimensionalShape, ThreeDimensionalBox, or ThreeDimensionalFace!")
             return False
 
 class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
     def __init__(self, boxes=[]):
+        self.frozen = False
         self.set_boxes(boxes)
 
-    def get_contained_positions(self, resolution=1) -> list:
-        positions = []
+    def freeze(self):
+        # Frozen shapes are shared between objects, so changing one in place would change every object using it
+        # Their boxes and faces are frozen too, since getters hand out the shared ones
+        self.frozen = True
         for box in self.get_boxes():
-            for pos in box.get_contained_positions(resolution=resolution):
-                if pos not in positions:
-                    positions.append(pos)
-        return positions
+            box.freeze()
+        return self
+
+    def pack(self):
+        return PackedThreeDimensionalShape.of_shape(self)
+
+    def get_packed(self):
+        # Frozen shapes can't change, so their packed arrays are built once and kept
+        if not self.is_frozen():
+            return self.pack()
+        packed = getattr(self, "packed", None)
+        if packed is None:
+            packed = self.pack().freeze()
+            self.packed = packed
+        return packed
+
+    def is_frozen(self):
+        return self.frozen
+
+    def get_contained_positions(self, resolution=1) -> list:
+        return ThreeDimensionalCornerHolder.voxels_to_positions(self.voxelize(resolution), resolution)
+
+    def voxelize(self, resolution=1):
+        # Each box is filled on its own, so concave shapes built from several boxes come out right
+        voxels = [box.voxelize(resolution) for box in self.get_boxes()]
+        voxels = [box_voxels for box_voxels in voxels if len(box_voxels) > 0]
+        if len(voxels) == 0:
+            return np.zeros((0, 3), dtype=np.int64)
+        return np.unique(np.concatenate(voxels), axis=0)
 
     def set_boxes(self, boxes: list=[]):
         self.boxes = boxes
@@ -644,6 +1295,9 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
         return self.boxes
 
     def remove_empty(self):
+        if self.is_frozen():
+            logger.warning(f"Could not remove empty boxes from shape {self} because it is frozen!")
+            return
         for box in self.get_boxes():
             if len(box.get_faces()) == 0:
                 self.boxes.remove(box)
@@ -657,9 +1311,19 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
         return faces
 
     def add_box(self, box):
+        if self.is_frozen():
+            logger.warning(f"Could not add box {box} to shape {self} because it is frozen!")
+            return
         self.boxes.append(box)
 
     def merge(self, other, offset_x=0, offset_y=0, offset_z=0, update_self=True):
+        if update_self and self.is_frozen():
+            logger.warning(f"Could not merge {other} into shape {self} in place because it is frozen, merging into a new shape instead!")
+            update_self = False
+        while isinstance(other, ThreeDimensionalInstance):
+            instance_x, instance_y, instance_z = other.get_offset()
+            offset_x, offset_y, offset_z = offset_x + instance_x, offset_y + instance_y, offset_z + instance_z
+            other = other.get_shape()
         if isinstance(other, ThreeDimensionalShape):
             if len(other.get_boxes()) > 0:
                 if offset_x != 0 or offset_y != 0 or offset_z != 0:
@@ -678,9 +1342,10 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
             return self
 
     def move(self, offset_x=0, offset_y=0, offset_z=0, update_self=True):
-        other_boxes = self.get_boxes().copy()
-        for box in other_boxes:
-            box.move(offset_x, offset_y, offset_z)
+        if update_self and self.is_frozen():
+            logger.warning(f"Could not move shape {self} in place because it is frozen, moving a new shape instead!")
+            update_self = False
+        other_boxes = [box.move(offset_x, offset_y, offset_z, update_self) for box in self.get_boxes()]
         if update_self:
             self.boxes = other_boxes
             return self
@@ -692,8 +1357,18 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
 
     class ThreeDimensionalBox(ThreeDimensionalCornerHolder):
         def __init__(self, faces=[]):
+            self.frozen = False
             self.set_faces(faces)
 
+        def freeze(self):
+            self.frozen = True
+            for face in self.get_faces():
+                face.freeze()
+            return self
+
+        def is_frozen(self):
+            return self.frozen
+
         def copy(self):
             return ThreeDimensionalShape.ThreeDimensionalBox([face.copy() for face in self.get_faces()])
 
@@ -721,20 +1396,27 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
             ])
 
         def set_faces(self, faces):
+            if self.is_frozen():
+                logger.warning(f"Could not set the faces of box {self} because it is frozen!")
+                return
             self.faces = faces
 
         def get_faces(self):
             return self.faces
 
         def remove_empty(self):
+            if self.is_frozen():
+                logger.warning(f"Could not remove empty faces from box {self} because it is frozen!")
+                return
             for face in self.get_faces():
                 if len(face.get_corners()) == 0:
                     self.faces.remove(face)
 
         def move(self, offset_x=0, offset_y=0, offset_z=0, update_self=True):
-            other_faces = self.get_faces().copy()
-            for face in other_faces:
-                face.move(offset_x, offset_y, offset_z)
+            if update_self and self.is_frozen():
+                logger.warning(f"Could not move box {self} in place because it is frozen, moving a new box instead!")
+                update_self = False
+            other_faces = [face.move(offset_x, offset_y, offset_z, update_self) for face in self.get_faces()]
             if update_self:
                 self.set_faces(other_faces)
                 return self
@@ -742,20 +1424,24 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
                 return ThreeDimensionalShape.ThreeDimensionalBox(other_faces)
 
         def get_wireframe_positions(self, resolution=1):
-            positions = self.get_corners().copy()
-            for i, corner in enumerate(positions):
-                for corner1 in positions[i:]:
-                    for pos in corner.trace(corner1, resolution=resolution):
-                        if pos not in positions:
-                            positions.append(pos)
+            corners = self.get_corners()
+            points = [corner.to_vector() for corner in corners]
+            positions = corners.copy()
+            seen = set(points)
+            for i, point in enumerate(points):
+                for point1 in points[i + 1:]:
+                    for traced in point.trace(point1, resolution=resolution):
+                        if traced not in seen:
+                            seen.add(traced)
+                            positions.append(traced.to_position())
             return positions
 
         def get_contained_positions(self, resolution=1):
-            # This works because it traces all points in self's wireframe, filling it
-            return ThreeDimensionalShape.ThreeDimensionalBox(faces=[ThreeDimensionalShape.ThreeDimensionalBox.ThreeDimensionalFace(corners=[corner]) for corner in self.get_wireframe_positions(resolution=resolution)]).get_wireframe_positions()
+            return ThreeDimensionalCornerHolder.voxels_to_positions(self.voxelize(resolution), resolution)
 
         class ThreeDimensionalFace(ThreeDimensionalCornerHolder):
             def __init__(self, corners=[], texture=None, shade_red=0, shade_green=0, shade_blue=0, shade_alpha=0):
+                self.frozen = False
                 self.set_corners(corners)
                 self.set_texture(texture)
                 self.set_shade_red(shade_red)
@@ -763,7 +1449,22 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
                 self.set_shade_blue(shade_blue)
                 self.set_shade_alpha(shade_alpha)
 
+            def freeze(self):
+                self.frozen = True
+                return self
+
+            def is_frozen(self):
+                return self.frozen
+
+            def warn_frozen(self, change):
+                if self.is_frozen():
+                    logger.warning(f"Could not {change} of face {self} because it is frozen!")
+                    return True
+                return False
+
             def set_corners(self, corners=[]):
+                if self.warn_frozen("set the corners"):
+                    return
                 self.corners = corners
                 # self.sort_corners()
 
@@ -789,7 +1490,7 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
                 overlaps_self = []
                 overlaps_others = []
                 new_others = others.copy()
-                for other in new_others:
+                for other in others:
                     if other.is_inside_shape(self):
                         overlaps_others.append(self)
                         new_others.remove(other)
@@ -838,44 +1539,56 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
                 return [self]
 
             def set_texture(self, texture):
+                if self.warn_frozen("set the texture"):
+                    return
                 self.texture = texture
 
             def get_texture(self):
                 return self.texture
 
             def set_shade_red(self, shade):
+                if self.warn_frozen("set the red shade"):
+                    return
                 self.shade_red = shade
 
             def get_shade_red(self):
                 return self.shade_red
 
             def set_shade_green(self, shade):
+                if self.warn_frozen("set the green shade"):
+                    return
                 self.shade_green = shade
 
             def get_shade_green(self):
                 return self.shade_green
 
             def set_shade_blue(self, shade):
+                if self.warn_frozen("set the blue shade"):
+                    return
                 self.shade_blue = shade
 
             def get_shade_blue(self):
                 return self.shade_blue
 
             def set_shade_alpha(self, shade):
+                if self.warn_frozen("set the alpha shade"):
+                    return
                 self.shade_alpha = shade
 
             def get_shade_alpha(self):
                 return self.shade_alpha
 
             def move(self, offset_x=0, offset_y=0, offset_z=0, update_self=True):
-                other_corners = self.get_corners().copy()
-                for corner in other_corners:
-                    corner.offset(offset_x, offset_y, offset_z, True)
+                # Build new corners rather than offsetting in place, since boxes share corners between their faces
+                if update_self and self.is_frozen():
+                    logger.warning(f"Could not move face {self} in place because it is frozen, moving a new face instead!")
+                    update_self = False
+                other_corners = [ThreeDimensionalPosition(corner.x + offset_x, corner.y + offset_y, corner.z + offset_z) for corner in self.get_corners()]
                 if update_self:
                     self.set_corners(other_corners)
                     return self
                 else:
-                    return ThreeDimensionalShape.ThreeDimensionalBox.ThreeDimensionalFace(other_corners)
+                    return ThreeDimensionalShape.ThreeDimensionalBox.ThreeDimensionalFace(other_corners, self.get_texture(), self.get_shade_red(), self.get_shade_green(), self.get_shade_blue(), self.get_shade_alpha())
 
             def copy(self):
                 texture = self.get_texture()
@@ -884,36 +1597,389 @@ class ThreeDimensionalShape(ThreeDimensionalCornerHolder):
                 return ThreeDimensionalShape.ThreeDimensionalBox.ThreeDimensionalFace([corner.copy() for corner in self.get_corners()], texture)
 
 
+class ThreeDimensionalInstance(ThreeDimensionalShape):
+    # A shared shape placed at an offset, its geometry is only copied when something asks for moved boxes or an owned shape
+    def __init__(self, shape, offset_x=0, offset_y=0, offset_z=0):
+        self.frozen = True
+        self.shape = shape
+        self.offset = (offset_x, offset_y, offset_z)
+        self.moved_boxes = None
+        self.moved_packed = None
+
+    def get_shape(self):
+        return self.shape
+
+    def set_shape(self, shape):
+        if shape is not self.shape:
+            self.shape = shape
+            self.moved_boxes = None
+            self.moved_packed = None
+        return self
+
+    def get_offset(self):
+        return self.offset
+
+    def set_offset(self, offset_x=0, offset_y=0, offset_z=0):
+        offset = (offset_x, offset_y, offset_z)
+        if offset != self.offset:
+            self.offset = offset
+            self.moved_boxes = None
+            self.moved_packed = None
+        return self
+
+    def get_boxes(self) -> list:
+        if self.moved_boxes is None:
+            self.moved_boxes = self.materialize().get_boxes()
+        return self.moved_boxes
+
+    def get_packed(self):
+        if self.moved_packed is None:
+            self.moved_packed = self.get_shape().get_packed().move(*self.get_offset(), update_self=False)
+        return self.moved_packed
+
+    def materialize(self):
+        shape = self.get_shape()
+        if isinstance(shape, ThreeDimensionalInstance):
+            shape = shape.materialize()
+        offset_x, offset_y, offset_z = self.get_offset()
+        if offset_x == 0 and offset_y == 0 and offset_z == 0:
+            return shape.copy()
+        return shape.move(offset_x, offset_y, offset_z, False)
+
+    def move(self, offset_x=0, offset_y=0, offset_z=0, update_self=True):
+        x, y, z = self.get_offset()
+        if update_self:
+            return self.set_offset(x + offset_x, y + offset_y, z + offset_z)
+        return ThreeDimensionalInstance(self.get_shape(), x + offset_x, y + offset_y, z + offset_z)
+
+    def copy(self):
+        return ThreeDimensionalInstance(self.get_shape(), *self.get_offset())
+
+
+class PackedThreeDimensionalShape():
+    # The same geometry as a ThreeDimensionalShape, flattened into arrays:
+    # vertices (n, 3) float32, face_offsets slicing indices into one corner list per face,
+    # and per face box numbers, texture ids into textures and (r, g, b, a) shades
+    def __init__(self, vertices=None, indices=None, face_offsets=None, face_boxes=None, texture_ids=None, textures=None, shades=None):
+        self.vertices = np.zeros((0, 3), dtype=np.float32) if vertices is None else np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.indices = np.zeros(0, dtype=np.int32) if indices is None else np.asarray(indices, dtype=np.int32)
+        self.face_offsets = np.zeros(1, dtype=np.int32) if face_offsets is None else np.asarray(face_offsets, dtype=np.int32)
+        self.face_boxes = np.zeros(0, dtype=np.int32) if face_boxes is None else np.asarray(face_boxes, dtype=np.int32)
+        self.texture_ids = np.zeros(0, dtype=np.int32) if texture_ids is None else np.asarray(texture_ids, dtype=np.int32)
+        self.textures = [] if textures is None else list(textures)
+        self.shades = np.zeros((0, 4), dtype=np.float32) if shades is None else np.asarray(shades, dtype=np.float32).reshape(-1, 4)
+
+    def of_shape(shape):
+        vertices = []
+        vertex_ids = {}
+        indices = []
+        face_offsets = [0]
+        face_boxes = []
+        texture_ids = []
+        textures = []
+        texture_keys = {}
+        shades = []
+        for box_i, box in enumerate(shape.get_boxes()):
+            for face in box.get_faces():
+                for corner in face.get_corners():
+                    point = (corner.get_x(), corner.get_y(), corner.get_z())
+                    vertex_id = vertex_ids.get(point)
+                    if vertex_id is None:
+                        vertex_id = len(vertices)
+                        vertex_ids[point] = vertex_id
+                        vertices.append(point)
+                    indices.append(vertex_id)
+                face_offsets.append(len(indices))
+                face_boxes.append(box_i)
+                texture = face.get_texture()
+                texture_key = str(texture)
+                texture_id = texture_keys.get(texture_key)
+                if texture_id is None:
+                    texture_id = len(textures)
+                    texture_keys[texture_key] = texture_id
+                    textures.append(texture)
+                texture_ids.append(texture_id)
+                shades.append((face.get_shade_red(), face.get_shade_green(), face.get_shade_blue(), face.get_shade_alpha()))
+        return PackedThreeDimensionalShape(vertices, indices, face_offsets, face_boxes, texture_ids, textures, shades)
+
+    def freeze(self):
+        # Packs cached for frozen shapes are shared, so their arrays are made read only
+        for array in (self.vertices, self.indices, self.face_offsets, self.face_boxes, self.texture_ids, self.shades):
+            array.flags.writeable = False
+        return self
+
+    def is_frozen(self):
+        return not self.vertices.flags.writeable
+
+    def to_shape(self):
+        boxes = {}
+        for face_i in range(self.get_face_count()):
+            corners = [ThreeDimensionalPosition(float(x), float(y), float(z)) for x, y, z in self.get_face_vertices(face_i)]
+            r, g, b, a = (float(shade) for shade in self.shades[face_i])
+            face = ThreeDimensionalShape.ThreeDimensionalBox.ThreeDimensionalFace(corners, self.get_face_texture(face_i), r, g, b, a)
+            boxes.setdefault(int(self.face_boxes[face_i]), []).append(face)
+        return ThreeDimensionalShape([ThreeDimensionalShape.ThreeDimensionalBox(faces) for faces in boxes.values()])
+
+    def get_vertices(self):
+        return self.vertices
+
+    def get_indices(self):
+        return self.indices
+
+    def get_face_offsets(self):
+        return self.face_offsets
+
+    def get_face_boxes(self):
+        return self.face_boxes
+
+    def get_texture_ids(self):
+        return self.texture_ids
+
+    def get_textures(self):
+        return self.textures
+
+    def get_shades(self):
+        return self.shades
+
+    def get_face_count(self):
+        return len(self.face_offsets) - 1
+
+    def get_box_count(self):
+        return len(np.unique(self.face_boxes))
+
+    def get_face_indices(self, face_i):
+        return self.indices[self.face_offsets[face_i]:self.face_offsets[face_i + 1]]
+
+    def get_face_vertices(self, face_i):
+        return self.vertices[self.get_face_indices(face_i)]
+
+    def get_face_texture(self, face_i):
+        return self.textures[self.texture_ids[face_i]]
+
+    def get_triangle_indices(self, face_i):
+        # Fans out from the first corner, which is enough for the convex faces boxes are made of
+        face_indices = self.get_face_indices(face_i)
+        count = len(face_indices)
+        if count < 3:
+            return np.zeros(0, dtype=np.int32)
+        triangles = np.empty((count - 2, 3), dtype=np.int32)
+        triangles[:, 0] = face_indices[0]
+        triangles[:, 1] = face_indices[1:-1]
+        triangles[:, 2] = face_indices[2:]
+        return triangles.reshape(-1)
+
+    def get_bounds(self):
+        if len(self.vertices) == 0:
+            return None
+        mins = self.vertices.min(axis=0)
+        maxs = self.vertices.max(axis=0)
+        return (float(mins[0]), float(mins[1]), float(mins[2]), float(maxs[0]), float(maxs[1]), float(maxs[2]))
+
+    def move(self, offset_x=0, offset_y=0, offset_z=0, update_self=True):
+        offset = np.array((offset_x, offset_y, offset_z), dtype=np.float32)
+        if update_self and self.is_frozen():
+            logger.warning(f"Could not move packed shape {self} in place because it is frozen, moving a new packed shape instead!")
+            update_self = False
+        if update_self:
+            self.vertices += offset
+            return self
+        return PackedThreeDimensionalShape(self.vertices + offset, self.indices, self.face_offsets, self.face_boxes, self.texture_ids, self.textures, self.shades)
+
+    def concat(parts):
+        # parts holds instances or (packed shape, offset x, offset y, offset z) and is joined with one concatenation per array
+        vertices, indices, face_offsets, face_boxes, texture_ids, shades = [], [], [np.zeros(1, dtype=np.int32)], [], [], []
+        textures = []
+        texture_keys = {}
+        vertex_count = 0
+        index_count = 0
+        box_count = 0
+        for part in parts:
+            if isinstance(part, ThreeDimensionalInstance):
+                packed = part.get_shape().get_packed()
+                offset_x, offset_y, offset_z = part.get_offset()
+            else:
+                packed, offset_x, offset_y, offset_z = part
+            if packed.get_face_count() == 0:
+                continue
+            vertices.append(packed.vertices + np.array((offset_x, offset_y, offset_z), dtype=np.float32))
+            indices.append(packed.indices + vertex_count)
+            face_offsets.append(packed.face_offsets[1:] + index_count)
+            face_boxes.append(packed.face_boxes + box_count)
+            texture_map = np.empty(len(packed.textures), dtype=np.int32)
+            for i, texture in enumerate(packed.textures):
+                texture_key = str(texture)
+                texture_id = texture_keys.get(texture_key)
+                if texture_id is None:
+                    texture_id = len(textures)
+                    texture_keys[texture_key] = texture_id
+                    textures.append(texture)
+                texture_map[i] = texture_id
+            texture_ids.append(texture_map[packed.texture_ids])
+            shades.append(packed.shades)
+            vertex_count += len(packed.vertices)
+            index_count += len(packed.indices)
+            box_count += int(packed.face_boxes.max()) + 1
+        if len(vertices) == 0:
+            return PackedThreeDimensionalShape()
+        return PackedThreeDimensionalShape(np.concatenate(vertices), np.concatenate(indices), np.concatenate(face_offsets), np.concatenate(face_boxes), np.concatenate(texture_ids), textures, np.concatenate(shades))
+
+    def merge(self, other, offset_x=0, offset_y=0, offset_z=0, update_self=True):
+        if isinstance(other, ThreeDimensionalInstance):
+            other, offset_x, offset_y, offset_z = other.get_shape(), offset_x + other.get_offset()[0], offset_y + other.get_offset()[1], offset_z + other.get_offset()[2]
+        if isinstance(other, ThreeDimensionalShape):
+            other = other.get_packed()
+        if not isinstance(other, PackedThreeDimensionalShape):
+            logger.warning(f"Could not merge packed shape {self} with other object {other} because other is not a shape!")
+            return self
+        merged = PackedThreeDimensionalShape.concat([(other, offset_x, offset_y, offset_z), (self, 0, 0, 0)])
+        if update_self:
+            self.__dict__.update(merged.__dict__)
+            return self
+        return merged
+
+    def copy(self):
+        return PackedThreeDimensionalShape(self.vertices.copy(), self.indices.copy(), self.face_offsets.copy(), self.face_boxes.copy(), self.texture_ids.copy(), self.textures, self.shades.copy())
+
+
+class ThreeDimensionalFrustum():
+    # Six planes stored as rows of (nx, ny, nz, d), a point p is inside a plane when n . p + d >= 0
+    def __init__(self, planes, corners=[]):
+        self.planes = np.asarray(planes, dtype=np.float64).reshape(-1, 4)
+        self.corners = corners
+
+    def of_view(view_pos, near, far, min_x_slope, max_x_slope, min_z_slope, max_z_slope):
+        # Looks along +y from view_pos, at depth d it spans x from min_x_slope*d to max_x_slope*d past view_pos, and likewise for z
+        vx, vy, vz = view_pos.get_x(), view_pos.get_y(), view_pos.get_z()
+        planes = [
+            (0, 1, 0, -(vy + near)), # Near
+            (0, -1, 0, vy + far), # Far
+            (1, -min_x_slope, 0, -vx + min_x_slope*vy), # Left
+            (-1, max_x_slope, 0, vx - max_x_slope*vy), # Right
+            (0, -min_z_slope, 1, -vz + min_z_slope*vy), # Bottom
+            (0, max_z_slope, -1, vz - max_z_slope*vy), # Top
+        ]
+        corners = []
+        for depth in (near, far):
+            for x_slope in (min_x_slope, max_x_slope):
+                for z_slope in (min_z_slope, max_z_slope):
+                    corners.append(ThreeDimensionalPosition(vx + x_slope*depth, vy + depth, vz + z_slope*depth))
+        return ThreeDimensionalFrustum(planes, corners)
+
+    def get_planes(self):
+        return self.planes
+
+    def get_corners(self):
+        return self.corners
+
+    def get_bounds(self):
+        corners = np.array([(corner.get_x(), corner.get_y(), corner.get_z()) for corner in self.get_corners()], dtype=np.float64)
+        mins = corners.min(axis=0)
+        maxs = corners.max(axis=0)
+        return (float(mins[0]), float(mins[1]), float(mins[2]), float(maxs[0]), float(maxs[1]), float(maxs[2]))
+
+    def contains_points(self, points):
+        if not isinstance(points, np.ndarray):
+            points = np.array([(point.get_x(), point.get_y(), point.get_z()) if hasattr(point, "get_x") else point for point in points], dtype=np.float64)
+        points = points.reshape(-1, 3)
+        return np.all(points @ self.planes[:, :3].T + self.planes[:, 3] >= 0, axis=1)
+
+    def intersects_bounds_array(self, bounds):
+        # Tests each box's corner furthest along every plane normal, boxes with that corner outside any plane are culled.
+        # Like any plane-only test it can keep a few boxes just outside the frustum's edges, but never drops a visible one.
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 6)
+        normals = self.planes[:, :3]
+        furthest = np.where(normals[None, :, :] >= 0, bounds[:, None, 3:], bounds[:, None, :3])
+        return np.all(np.einsum("bpk,pk->bp", furthest, normals) + self.planes[:, 3] >= 0, axis=1)
+
+    def intersects_bounds(self, bounds):
+        return bool(self.intersects_bounds_array(bounds)[0])
+
+
 class SpaceGameObject(MainGameObject):
     def __init__(self, ide, server, pos=ThreeDimensionalPosition.get_origin(), space=None):
         super().__init__(ide, server)
 
+        self.object_store = None
+        self.store_index = None
         self.set_pos(pos)
         self.set_current_space(space)
 
-    def get_model(self):
+    def create_model(self):
+        return None
+
+    def mark_dirty(self):
+        # For state changed without set_data or set_pos, so the next incremental save picks it up
+        space = self.get_current_space() if hasattr(self, "space") else None
+        if space is not None and space is not self:
+            space.mark_obj_dirty(self)
+        return self
+
+    def set_data(self, data):
+        super().set_data(data)
+        return self.mark_dirty()
+
+    def get_model_variant(self):
+        # Objects whose shape depends on their state return a hashable key here, one cached model is kept per key
         return None
 
+    def get_model_cache_key(self):
+        return (self.get_id().get_path_str(), self.get_model_variant())
+
+    def get_model(self):
+        key = self.get_model_cache_key()
+        if key in model_cache:
+            return model_cache[key]
+        model = self.create_model()
+        if isinstance(model, ThreeDimensionalShape):
+            model.freeze()
+        model_cache[key] = model
+        return model
+
+    def get_model_bounds(self):
+        # Bounds of the collision shape relative to the object's position, shared like the models themselves
+        key = self.get_model_cache_key()
+        if key in model_bounds_cache:
+            return model_bounds_cache[key]
+        shape = self.get_collision_shape()
+        bounds = shape.get_bounds() if isinstance(shape, ThreeDimensionalCornerHolder) else None
+        model_bounds_cache[key] = bounds
+        return bounds
+
+    def invalidate_model(self):
+        key = self.get_model_cache_key()
+        model_cache.pop(key, None)
+        model_bounds_cache.pop(key, None)
+        space = self.get_current_space()
+        if space is not None and space is not self and space.contains_obj(self):
+            space.update_obj_bounds(self)
+
     def get_collision_shape(self):
         return self.get_model()
 
     def set_pos(self, pos):
-        should_set = True
-        has_pos = hasattr(self, "pos")
-        if has_pos:
-            should_set = self.pos != pos
-        if should_set:
-            if has_pos and self.get_current_space() is not None and self.get_current_space() != self:
-                self.get_current_space().remove_obj_at_pos(self.pos, [self])
-                self.pos = pos
-                self.get_current_space().add_obj_at_pos(pos, self)
-            else:
-                self.pos = pos
+        space = self.get_current_space() if hasattr(self, "space") else None
+        if space is not None and space is not self and space.contains_obj(self):
+            space.move_obj(self, pos)
+        else:
+            self.pos = pos
         return self
 
     def get_pos(self):
+        if self.object_store is not None:
+            return self.object_store.get_pos(self.store_index)
         return self.pos
 
+    def set_object_store(self, store, index=None):
+        self.object_store = store
+        self.store_index = index
+        return self
+
+    def get_object_store(self):
+        return self.object_store
+
+    def get_store_index(self):
+        return self.store_index
+
     def set_current_space(self, space):
         self.space = space
         return self
@@ -932,7 +1998,7 @@ class Item(SpaceGameObject):
     def __init__(self, ide, server, pos=ThreeDimensionalPosition.get_origin(), space=None):
         super().__init__(ide, server, pos, space)
 
-    def get_model(self):
+    def create_model(self):
         return Item.BaseItemShape()
 
     class BaseItemShape(ThreeDimensionalShape):
@@ -949,7 +2015,7 @@ class Tile(SpaceGameObject):
     def __init__(self, ide, server, pos=ThreeDimensionalPosition.get_origin(), space=None):
         super().__init__(ide, server, pos, space)
 
-    def get_model(self):
+    def create_model(self):
         return Tile.BaseTilehape()
 
     class BaseTilehape(ThreeDimensionalShape):
@@ -975,19 +2041,889 @@ class Entity(SpaceGameObject):
         return []
 
 
+class ThreeDimensionalSpatialHash():
+    def __init__(self, cell_size=16):
+        self.set_cell_size(cell_size)
+        self.cells = {}
+        self.entry_cells = {}
+
+    def set_cell_size(self, cell_size=16):
+        self.cell_size = cell_size
+
+    def get_cell_size(self):
+        return self.cell_size
+
+    def get_cell_key(self, x, y, z):
+        cell_size = self.get_cell_size()
+        return (floor(x / cell_size), floor(y / cell_size), floor(z / cell_size))
+
+    def get_cell_key_of_pos(self, pos):
+        return self.get_cell_key(pos.get_x(), pos.get_y(), pos.get_z())
+
+    def get_cells(self):
+        return self.cells
+
+    def get_cell(self, cell_key):
+        return self.cells.get(cell_key, {})
+
+    def get_point(self, key):
+        cell_key = self.entry_cells.get(key)
+        if cell_key is not None:
+            return self.cells[cell_key][key]
+        return None
+
+    def contains_key(self, key):
+        return key in self.entry_cells
+
+    def add(self, key, pos):
+        if self.contains_key(key):
+            self.remove(key)
+        point = (pos.get_x(), pos.get_y(), pos.get_z())
+        cell_key = self.get_cell_key(*point)
+        cell = self.cells.get(cell_key)
+        if cell is None:
+            cell = {}
+            self.cells[cell_key] = cell
+        cell[key] = point
+        self.entry_cells[key] = cell_key
+
+    def remove(self, key):
+        cell_key = self.entry_cells.pop(key, None)
+        if cell_key is not None:
+            cell = self.cells[cell_key]
+            cell.pop(key, None)
+            if len(cell) == 0:
+                self.cells.pop(cell_key)
+
+    def get_keys_at_pos(self, pos):
+        point = (pos.get_x(), pos.get_y(), pos.get_z())
+        return [key for key, key_point in self.get_cell(self.get_cell_key(*point)).items() if key_point == point]
+
+    def get_keys_by_point(self):
+        keys_by_point = {}
+        for cell in self.cells.values():
+            for key, point in cell.items():
+                keys = keys_by_point.get(point)
+                if keys is None:
+                    keys_by_point[point] = [key]
+                else:
+                    keys.append(key)
+        return keys_by_point
+
+    def __len__(self):
+        return len(self.entry_cells)
+
+
+class ThreeDimensionalOctree():
+    class OctreeNode():
+        def __init__(self, center, half_size, parent=None):
+            self.center = center
+            self.half_size = half_size
+            self.parent = parent
+            self.items = {}
+            self.children = None
+
+        def get_bounds(self):
+            cx, cy, cz = self.center
+            h = self.half_size
+            return (cx - h, cy - h, cz - h, cx + h, cy + h, cz + h)
+
+        def contains_bounds(self, bounds):
+            cx, cy, cz = self.center
+            h = self.half_size
+            return cx - h <= bounds[0] and cy - h <= bounds[1] and cz - h <= bounds[2] and bounds[3] <= cx + h and bounds[4] <= cy + h and bounds[5] <= cz + h
+
+        def intersects_bounds(self, bounds):
+            cx, cy, cz = self.center
+            h = self.half_size
+            return bounds[0] <= cx + h and bounds[3] >= cx - h and bounds[1] <= cy + h and bounds[4] >= cy - h and bounds[2] <= cz + h and bounds[5] >= cz - h
+
+        def get_child_index(self, bounds):
+            index = 0
+            for axis, bit in ((0, 1), (1, 2), (2, 4)):
+                if bounds[axis] >= self.center[axis]:
+                    index |= bit
+                elif bounds[axis + 3] > self.center[axis]:
+                    return None
+            return index
+
+        def get_child_center(self, index):
+            q = self.half_size / 2
+            cx, cy, cz = self.center
+            return (cx + q if index & 1 else cx - q, cy + q if index & 2 else cy - q, cz + q if index & 4 else cz - q)
+
+        def split(self):
+            self.children = [ThreeDimensionalOctree.OctreeNode(self.get_child_center(i), self.half_size / 2, self) for i in range(8)]
+
+        def is_empty(self):
+            return len(self.items) == 0 and (self.children is None or all(child.is_empty() for child in self.children))
+
+    def __init__(self, half_size=64, capacity=8, min_half_size=0.5):
+        self.capacity = capacity
+        self.min_half_size = min_half_size
+        self.root = ThreeDimensionalOctree.OctreeNode((0, 0, 0), half_size)
+        self.item_nodes = {}
+
+    def get_root(self):
+        return self.root
+
+    def get_capacity(self):
+        return self.capacity
+
+    def get_min_half_size(self):
+        return self.min_half_size
+
+    def get_bounds(self, key):
+        node = self.item_nodes.get(key)
+        if node is not None:
+            return node.items[key]
+        return None
+
+    def contains_key(self, key):
+        return key in self.item_nodes
+
+    def grow_to_contain(self, bounds):
+        while not self.root.contains_bounds(bounds):
+            old_root = self.root
+            h = old_root.half_size
+            center = tuple(old_root.center[axis] + (h if bounds[axis + 3] > old_root.center[axis] + h else -h) for axis in range(3))
+            new_root = ThreeDimensionalOctree.OctreeNode(center, h * 2)
+            new_root.split()
+            index = new_root.get_child_index(old_root.get_bounds())
+            old_root.parent = new_root
+            new_root.children[index] = old_root
+            self.root = new_root
+
+    def insert_into_node(self, node, key, bounds):
+        while node.children is not None:
+            index = node.get_child_index(bounds)
+            if index is None:
+                break
+            node = node.children[index]
+        node.items[key] = bounds
+        self.item_nodes[key] = node
+        if node.children is None and len(node.items) > self.get_capacity() and node.half_size / 2 >= self.get_min_half_size():
+            node.split()
+            for item_key, item_bounds in list(node.items.items()):
+                index = node.get_child_index(item_bounds)
+                if index is not None:
+                    node.items.pop(item_key)
+                    child = node.children[index]
+                    child.items[item_key] = item_bounds
+                    self.item_nodes[item_key] = child
+
+    def insert(self, key, bounds):
+        if self.contains_key(key):
+            self.remove(key)
+        if not all(isfinite(value) for value in bounds):
+            # The root could never grow to contain these, so the item is left out rather than hanging the tick
+            logger.warning(f"Could not add {key} to the octree because its bounds {bounds} are not finite!")
+            return
+        self.grow_to_contain(bounds)
+        self.insert_into_node(self.root, key, bounds)
+
+    def prune(self, node):
+        while node is not None and node.children is not None and node.is_empty():
+            node.children = None
+            node = node.parent
+
+    def remove(self, key):
+        node = self.item_nodes.pop(key, None)
+        if node is not None:
+            node.items.pop(key, None)
+            if len(node.items) == 0 and node.parent is not None and node.parent.is_empty():
+                self.prune(node.parent)
+
+    def update(self, key, bounds):
+        node = self.item_nodes.get(key)
+        if node is not None and all(isfinite(value) for value in bounds) and node.contains_bounds(bounds) and (node.children is None or node.get_child_index(bounds) is None):
+            node.items[key] = bounds
+        else:
+            self.insert(key, bounds)
+
+    def query_bounds(self, bounds):
+        keys = []
+        stack = [self.root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.intersects_bounds(bounds):
+                for key, item_bounds in node.items.items():
+                    if item_bounds[0] <= bounds[3] and item_bounds[3] >= bounds[0] and item_bounds[1] <= bounds[4] and item_bounds[4] >= bounds[1] and item_bounds[2] <= bounds[5] and item_bounds[5] >= bounds[2]:
+                        keys.append(key)
+                if node.children is not None:
+                    stack.extend(node.children)
+        return keys
+
+    def get_bounds_distance(point, bounds):
+        dx = max(bounds[0] - point[0], 0, point[0] - bounds[3])
+        dy = max(bounds[1] - point[1], 0, point[1] - bounds[4])
+        dz = max(bounds[2] - point[2], 0, point[2] - bounds[5])
+        return (dx*dx + dy*dy + dz*dz)**0.5
+
+    def iter_nearest(self, point, exclude_keys=set(), max_distance=None, get_item_point=None):
+        # Best-first search: nodes and items share one heap ordered by their distance to point, so keys come out nearest first.
+        # With get_item_point, an item's bounds distance is only a lower bound, and it goes back on the heap with the exact
+        # distance to its point the first time it comes out.
+        heap = [(0, 0, 0, self.root)]
+        counter = 1
+        while len(heap) > 0:
+            dist, _, kind, entry = heappop(heap)
+            if max_distance is not None and dist > max_distance:
+                return
+            if kind == 0:
+                for key, bounds in entry.items.items():
+                    if key not in exclude_keys:
+                        heappush(heap, (ThreeDimensionalOctree.get_bounds_distance(point, bounds), counter, 1 if get_item_point is not None else 2, key))
+                        counter += 1
+                if entry.children is not None:
+                    for child in entry.children:
+                        if len(child.items) > 0 or child.children is not None:
+                            heappush(heap, (ThreeDimensionalOctree.get_bounds_distance(point, child.get_bounds()), counter, 0, child))
+                            counter += 1
+            elif kind == 1:
+                item_point = get_item_point(entry)
+                heappush(heap, (ThreeDimensionalOctree.get_bounds_distance(point, (*item_point, *item_point)), counter, 2, entry))
+                counter += 1
+            else:
+                yield dist, entry
+
+    def query_nearest(self, point, k=1, exclude_keys=set(), max_distance=None, get_item_point=None):
+        nearest = []
+        if k > 0:
+            for dist, key in self.iter_nearest(point, exclude_keys, max_distance, get_item_point):
+                nearest.append((dist, key))
+                if len(nearest) >= k:
+                    break
+        return nearest
+
+    def query_radius(self, point, radius, exclude_keys=set(), get_item_point=None):
+        x, y, z = point
+        keys = []
+        for key in self.query_bounds((x - radius, y - radius, z - radius, x + radius, y + radius, z + radius)):
+            if key not in exclude_keys:
+                if get_item_point is not None:
+                    item_point = get_item_point(key)
+                    bounds = (*item_point, *item_point)
+                else:
+                    bounds = self.get_bounds(key)
+                if ThreeDimensionalOctree.get_bounds_distance(point, bounds) <= radius:
+                    keys.append(key)
+        return keys
+
+    def __len__(self):
+        return len(self.item_nodes)
+
+
+class ThreeDimensionalMassOctree():
+    class MassNode():
+        def __init__(self, center, half_size):
+            self.center = center
+            self.half_size = half_size
+            self.mass = 0
+            self.weighted_x = 0
+            self.weighted_y = 0
+            self.weighted_z = 0
+            self.bodies = []
+            self.children = None
+
+        def add_mass(self, x, y, z, mass):
+            self.mass += mass
+            self.weighted_x += x * mass
+            self.weighted_y += y * mass
+            self.weighted_z += z * mass
+
+        def get_center_of_mass(self):
+            return (self.weighted_x / self.mass, self.weighted_y / self.mass, self.weighted_z / self.mass)
+
+        def get_octant(self, x, y, z):
+            cx, cy, cz = self.center
+            return (1 if x >= cx else 0) | (2 if y >= cy else 0) | (4 if z >= cz else 0)
+
+        def contains_point(self, x, y, z):
+            cx, cy, cz = self.center
+            h = self.half_size
+            return cx - h <= x <= cx + h and cy - h <= y <= cy + h and cz - h <= z <= cz + h
+
+        def split(self):
+            q = self.half_size / 2
+            cx, cy, cz = self.center
+            self.children = [ThreeDimensionalMassOctree.MassNode((cx + q if i & 1 else cx - q, cy + q if i & 2 else cy - q, cz + q if i & 4 else cz - q), q) for i in range(8)]
+
+    def __init__(self, bodies=[], opening_angle=0.5, min_half_size=0.001):
+        # Each body is a tuple of (key, x, y, z, mass)
+        self.opening_angle = opening_angle
+        self.min_half_size = min_half_size
+        if len(bodies) > 0:
+            lo = [min(body[axis] for body in bodies) for axis in (1, 2, 3)]
+            hi = [max(body[axis] for body in bodies) for axis in (1, 2, 3)]
+            half_size = max(max(hi[axis] - lo[axis] for axis in range(3)) / 2, min_half_size)
+            self.root = ThreeDimensionalMassOctree.MassNode(tuple((lo[axis] + hi[axis]) / 2 for axis in range(3)), half_size)
+        else:
+            self.root = ThreeDimensionalMassOctree.MassNode((0, 0, 0), min_half_size)
+        for body in bodies:
+            if body[4] > 0:
+                self.insert(self.root, body)
+
+    def get_opening_angle(self):
+        return self.opening_angle
+
+    def get_root(self):
+        return self.root
+
+    def insert(self, node, body):
+        _, x, y, z, mass = body
+        while True:
+            node.add_mass(x, y, z, mass)
+            if node.children is None:
+                if len(node.bodies) == 0 or node.half_size / 2 < self.min_half_size:
+                    node.bodies.append(body)
+                    return
+                node.split()
+                existing = node.bodies
+                node.bodies = []
+                for other in existing:
+                    self.insert(node.children[node.get_octant(other[1], other[2], other[3])], other)
+            node = node.children[node.get_octant(x, y, z)]
+
+    def iter_attractors(self, key, x, y, z):
+        # Yields (mass, x, y, z) for every body or far enough cluster of bodies acting on the point, leaving out the body under key
+        stack = [self.root]
+        opening_angle = self.get_opening_angle()
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.mass <= 0:
+                continue
+            if node.children is None:
+                for body in node.bodies:
+                    if body[0] != key:
+                        yield body[4], body[1], body[2], body[3]
+                continue
+            if not node.contains_point(x, y, z):
+                cx, cy, cz = node.get_center_of_mass()
+                dist = ((cx - x)**2 + (cy - y)**2 + (cz - z)**2)**0.5
+                if dist > 0 and (node.half_size * 2) / dist < opening_angle:
+                    yield node.mass, cx, cy, cz
+                    continue
+            stack.extend(node.children)
+
+
+class SpaceGameObjectStore():
+    def __init__(self, capacity=64):
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.z = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.vz = np.zeros(capacity)
+        self.mass = np.zeros(capacity)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.objects = [None] * capacity
+        self.free_indices = list(range(capacity - 1, -1, -1))
+
+    def get_capacity(self):
+        return len(self.objects)
+
+    def grow(self):
+        capacity = self.get_capacity()
+        new_capacity = max(capacity * 2, 1)
+        for name in ("x", "y", "z", "vx", "vy", "vz", "mass", "active"):
+            old = getattr(self, name)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+        self.objects.extend([None] * (new_capacity - capacity))
+        self.free_indices = list(range(new_capacity - 1, capacity - 1, -1)) + self.free_indices
+
+    def add_obj(self, obj, pos):
+        if len(self.free_indices) == 0:
+            self.grow()
+        index = self.free_indices.pop()
+        self.objects[index] = obj
+        self.active[index] = True
+        self.set_pos(index, pos)
+        self.vx[index] = self.vy[index] = self.vz[index] = 0
+        self.mass[index] = obj.get_mass()
+        obj.set_object_store(self, index)
+        return index
+
+    def release_obj(self, obj):
+        index = obj.get_store_index()
+        if obj.get_object_store() is self and index is not None:
+            obj.pos = self.get_pos(index)
+            obj.set_object_store(None)
+            self.objects[index] = None
+            self.active[index] = False
+            self.free_indices.append(index)
+        return obj
+
+    def get_pos(self, index):
+        return ThreeDimensionalPosition(float(self.x[index]), float(self.y[index]), float(self.z[index]))
+
+    def set_pos(self, index, pos):
+        self.x[index] = pos.get_x()
+        self.y[index] = pos.get_y()
+        self.z[index] = pos.get_z()
+
+    def get_obj(self, index):
+        return self.objects[index]
+
+    def get_active_indices(self):
+        return np.flatnonzero(self.active)
+
+    def get_indices_of(self, objects):
+        return np.fromiter((obj.get_store_index() for obj in objects), dtype=np.intp, count=len(objects))
+
+    def update_masses(self, indices):
+        objects = self.objects
+        self.mass[indices] = [objects[index].get_mass() for index in indices.tolist()]
+
+    def get_distances(self, indices, x, y, z):
+        return np.sqrt((self.x[indices] - x)**2 + (self.y[indices] - y)**2 + (self.z[indices] - z)**2)
+
+    def set_velocities(self, indices, vx, vy, vz):
+        self.vx[indices] = vx
+        self.vy[indices] = vy
+        self.vz[indices] = vz
+
+    def offset(self, indices, dx, dy, dz):
+        self.x[indices] += dx
+        self.y[indices] += dy
+        self.z[indices] += dz
+
+    def integrate(self, indices):
+        # Moves every object by its velocity at once and returns the indices that actually moved
+        vx, vy, vz = self.vx[indices], self.vy[indices], self.vz[indices]
+        self.offset(indices, vx, vy, vz)
+        return indices[(vx != 0) | (vy != 0) | (vz != 0)]
+
+
 class ThreeDimensionalSpace(SpaceGameObject):
     def __init__(self, ide, server):
         super().__init__(ide, server, ThreeDimensionalPosition.get_origin(), self)
 
         self.space_game_obj_sets = MultiKeyDict()
+        self.spatial_index = ThreeDimensionalSpatialHash(self.get_spatial_index_cell_size())
+        self.region_index = ThreeDimensionalOctree()
+        self.obj_store = SpaceGameObjectStore()
+        self.obj_keys = {}
         self.obj_lock = False
+        self.set_gravity_mode(ThreeDimensionalSpace.GravityModes.LEGACY)
+        self.set_gravity_opening_angle(0.5)
+        self.chunks = {}
+        self.obj_chunks = {}
+        self.generated_chunks = set()
+        self.evicted_chunks = set()
+        self.stored_chunks = set()
+        self.dirty_chunks = set()
+        self.chunk_eviction_paused = False
+        self.chunk_storage = None
+        self.last_chunk_update = None
+        self.wanted_chunks = set()
+        self.chunk_generator = None
+        self.pending_chunks = {}
+        self.set_seed(0)
+        self.set_max_pending_chunks(4)
+        self.set_chunk_size(64)
+        self.set_chunk_load_radius(2)
+        self.set_chunk_unload_timeout(60)
+        self.set_chunk_update_interval(1)
+
+    class Chunk():
+        # A chunk_size cube of the space, holding the objects whose position falls inside it
+        def __init__(self, coords):
+            self.coords = coords
+            self.objects = {}
+            self.touch()
+
+        def get_coords(self):
+            return self.coords
+
+        def get_objects(self):
+            return self.objects.values()
+
+        def add_obj(self, obj):
+            self.objects[id(obj)] = obj
+
+        def remove_obj(self, obj):
+            self.objects.pop(id(obj), None)
+
+        def is_empty(self):
+            return len(self.objects) == 0
+
+        def touch(self, current_time=None):
+            self.last_active = gettime() if current_time is None else current_time
+
+        def get_last_active(self):
+            return self.last_active
+
+    class ChunkStorage():
+        # Where evicted chunks go, spaces without one keep every chunk in memory
+        def has_chunk(self, space, coords):
+            return False
+
+        def save_chunk(self, space, coords, objects_data):
+            pass
+
+        def load_chunk(self, space, coords):
+            return None
+
+    class GravityModes(Enum):
+        LEGACY = "legacy"
+        BARNES_HUT = "barnes_hut"
+
+    def set_gravity_mode(self, mode):
+        if isinstance(mode, str):
+            mode = ThreeDimensionalSpace.GravityModes(mode)
+        self.gravity_mode = mode
+        return self
+
+    def get_gravity_mode(self):
+        return self.gravity_mode
+
+    def set_gravity_opening_angle(self, opening_angle=0.5):
+        self.gravity_opening_angle = opening_angle
+        return self
+
+    def get_gravity_opening_angle(self):
+        return self.gravity_opening_angle
 
     def get_server(self):
         return self.server
 
     def generate_terrain_at_pos(self, pos=ThreeDimensionalPosition.get_origin()):
+        # Called once for the origin of every chunk that gets generated, which is every chunk near a player,
+        # so it must only add objects inside the chunk_size cube starting at pos, anything ignoring pos is added over and over
         pass
 
+    def get_chunk_generation_task(self):
+        # A picklable top level function (origin, chunk_size, seed) -> [(ide path str, x, y, z), ...], run in a worker process
+        # Spaces without one generate on the tick thread through generate_terrain_at_pos
+        # Like generate_terrain_at_pos it runs for every chunk and must only return objects for the chunk at origin
+        return None
+
+    def set_seed(self, seed=0):
+        self.seed = seed
+        return self
+
+    def get_seed(self):
+        return self.seed
+
+    def get_chunk_seed(self, coords):
+        # Stable across runs and processes, unlike hash()
+        key = f"{self.get_id().get_path_str()}:{self.get_seed()}:{coords[0]}:{coords[1]}:{coords[2]}".encode()
+        return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+    def set_chunk_generator(self, executor):
+        self.chunk_generator = executor
+        return self
+
+    def get_chunk_generator(self):
+        return self.chunk_generator
+
+    def set_max_pending_chunks(self, max_pending=4):
+        self.max_pending_chunks = max_pending
+        return self
+
+    def get_max_pending_chunks(self):
+        return self.max_pending_chunks
+
+    def can_generate_chunks_async(self):
+        return self.get_chunk_generator() is not None and self.get_chunk_generation_task() is not None
+
+    def get_pending_chunks(self):
+        return self.pending_chunks
+
+    def is_chunk_pending(self, coords):
+        return coords in self.pending_chunks
+
+    def set_chunk_size(self, chunk_size=64):
+        if len(self.obj_chunks) > 0 and chunk_size != getattr(self, "chunk_size", chunk_size):
+            logger.warning(f"Could not change the chunk size of space {self.get_id()} to {chunk_size} because it already has chunks!")
+            return self
+        self.chunk_size = chunk_size
+        return self
+
+    def get_chunk_size(self):
+        return self.chunk_size
+
+    def set_chunk_load_radius(self, radius=2):
+        self.chunk_load_radius = radius
+        return self
+
+    def get_chunk_load_radius(self):
+        return self.chunk_load_radius
+
+    def set_chunk_unload_timeout(self, timeout=60):
+        self.chunk_unload_timeout = timeout
+        return self
+
+    def get_chunk_unload_timeout(self):
+        return self.chunk_unload_timeout
+
+    def set_chunk_update_interval(self, interval=1):
+        self.chunk_update_interval = interval
+        return self
+
+    def get_chunk_update_interval(self):
+        return self.chunk_update_interval
+
+    def set_chunk_storage(self, storage):
+        self.chunk_storage = storage
+        return self
+
+    def get_chunk_storage(self):
+        return self.chunk_storage
+
+    def get_chunks(self):
+        return self.chunks
+
+    def get_chunk(self, coords):
+        return self.chunks.get(coords)
+
+    def get_or_create_chunk(self, coords):
+        chunk = self.chunks.get(coords)
+        if chunk is None:
+            chunk = ThreeDimensionalSpace.Chunk(coords)
+            self.chunks[coords] = chunk
+        return chunk
+
+    def get_chunk_coords(self, pos):
+        size = self.get_chunk_size()
+        return (floor(pos.get_x() / size), floor(pos.get_y() / size), floor(pos.get_z() / size))
+
+    def get_chunk_origin(self, coords):
+        size = self.get_chunk_size()
+        return ThreeDimensionalPosition(coords[0] * size, coords[1] * size, coords[2] * size)
+
+    def get_obj_chunk(self, obj):
+        coords = self.obj_chunks.get(id(obj))
+        return None if coords is None else self.chunks.get(coords)
+
+    def is_chunk_loaded(self, coords):
+        return coords in self.chunks
+
+    def mark_chunk_dirty(self, coords):
+        self.dirty_chunks.add(coords)
+        return self
+
+    def mark_obj_dirty(self, obj):
+        coords = self.obj_chunks.get(id(obj))
+        if coords is not None:
+            self.dirty_chunks.add(coords)
+        return self
+
+    def get_dirty_chunks(self):
+        return self.dirty_chunks
+
+    def is_chunk_dirty(self, coords):
+        return coords in self.dirty_chunks
+
+    def get_stored_chunks(self):
+        return self.stored_chunks
+
+    def snapshot_dirty_chunks(self, include_data=True):
+        # Takes the data of every changed chunk that is in memory and counts them as stored, whoever takes the
+        # snapshot has to write it to chunk storage, or mark the chunks dirty again if that fails
+        # Evicted chunks were already written when they left, without include_data only the coords are kept
+        snapshot = {}
+        if self.get_chunk_storage() is None:
+            return snapshot
+        for coords in list(self.dirty_chunks):
+            chunk = self.chunks.get(coords)
+            if chunk is not None:
+                if chunk.is_empty():
+                    # Nothing will read a stale file for a chunk that isn't listed as stored
+                    self.stored_chunks.discard(coords)
+                else:
+                    snapshot[coords] = [self.get_obj_data(obj) for obj in chunk.get_objects()] if include_data else None
+                    self.stored_chunks.add(coords)
+            self.dirty_chunks.discard(coords)
+        return snapshot
+
+    def save_dirty_chunks(self):
+        storage = self.get_chunk_storage()
+        snapshot = self.snapshot_dirty_chunks()
+        for coords, objects_data in snapshot.items():
+            storage.save_chunk(self, coords, objects_data)
+        return len(snapshot)
+
+    def set_chunk_eviction_paused(self, paused):
+        # While a snapshot is being written in the background, evicting could write newer chunk data that the snapshot then overwrites
+        self.chunk_eviction_paused = paused
+        return self
+
+    def is_chunk_eviction_paused(self):
+        return self.chunk_eviction_paused
+
+    def get_chunk_anchor_positions(self):
+        # Chunks near these positions are kept loaded, and generated or loaded when missing
+        return []
+
+    def is_active(self):
+        # Servers keep active spaces loaded, the rest can be unloaded once idle
+        return len(self.get_chunk_anchor_positions()) > 0
+
+    def get_wanted_chunk_coords(self):
+        radius = self.get_chunk_load_radius()
+        wanted = set()
+        for pos in self.get_chunk_anchor_positions():
+            cx, cy, cz = self.get_chunk_coords(pos)
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    for dz in range(-radius, radius + 1):
+                        wanted.add((cx + dx, cy + dy, cz + dz))
+        return wanted
+
+    def get_chunk_generation_args(self, coords):
+        origin = self.get_chunk_origin(coords)
+        return (origin.get_x(), origin.get_y(), origin.get_z()), self.get_chunk_size(), self.get_chunk_seed(coords)
+
+    def generate_chunk(self, coords):
+        self.cancel_chunk_generation(coords)
+        task = self.get_chunk_generation_task()
+        if task is None:
+            self.generated_chunks.add(coords)
+            self.get_or_create_chunk(coords)
+            self.generate_terrain_at_pos(self.get_chunk_origin(coords))
+        else:
+            self.merge_chunk_payload(coords, task(*self.get_chunk_generation_args(coords)))
+        return self
+
+    def merge_chunk_payload(self, coords, payload):
+        self.generated_chunks.add(coords)
+        self.get_or_create_chunk(coords)
+        registry = self.get_server().get_registry()
+        for ide, x, y, z in payload:
+            obj_pair = registry.get_entry(Identifier(ide))
+            obj = None if obj_pair is None else obj_pair.get_obj()
+            if obj is None:
+                logger.warning(f"Generated chunk {coords} of space {self.get_id()} has an unknown object {ide}, skipping it!")
+                continue
+            self.add_obj_at_pos(ThreeDimensionalPosition(x, y, z), obj)
+        return self
+
+    def get_chunk_distance_to_anchors(self, coords, anchor_coords):
+        return min(((coords[0] - ax)**2 + (coords[1] - ay)**2 + (coords[2] - az)**2 for ax, ay, az in anchor_coords), default=0)
+
+    def request_chunk_generation(self, coords_list):
+        # Closest chunks first, with only a few in flight so that newly wanted chunks can overtake older ones
+        anchor_coords = [self.get_chunk_coords(pos) for pos in self.get_chunk_anchor_positions()]
+        executor = self.get_chunk_generator()
+        task = self.get_chunk_generation_task()
+        for coords in sorted(coords_list, key=lambda coords: self.get_chunk_distance_to_anchors(coords, anchor_coords)):
+            if len(self.pending_chunks) >= self.get_max_pending_chunks():
+                break
+            if coords in self.pending_chunks or coords in self.generated_chunks:
+                continue
+            try:
+                self.pending_chunks[coords] = executor.submit(task, *self.get_chunk_generation_args(coords))
+            except Exception as e:
+                logger.warning(f"Failed to queue generation of chunk {coords} of space {self.get_id()}, generating it now instead: {e}")
+                self.generate_chunk(coords)
+        return self
+
+    def cancel_chunk_generation(self, coords):
+        future = self.pending_chunks.pop(coords, None)
+        if future is not None:
+            # A job that already started can't be stopped, its result is just dropped
+            future.cancel()
+        return self
+
+    def cancel_unwanted_chunk_generation(self, wanted):
+        for coords in [coords for coords in self.pending_chunks.keys() if coords not in wanted]:
+            self.cancel_chunk_generation(coords)
+        return self
+
+    def merge_generated_chunks(self):
+        freed = False
+        for coords, future in list(self.pending_chunks.items()):
+            if not future.done():
+                continue
+            self.pending_chunks.pop(coords, None)
+            freed = True
+            if future.cancelled() or coords in self.generated_chunks:
+                continue
+            try:
+                payload = future.result()
+            except Exception as e:
+                logger.warning(f"Failed to generate chunk {coords} of space {self.get_id()} in the background, generating it now instead: {e}")
+                self.generate_chunk(coords)
+                continue
+            self.merge_chunk_payload(coords, payload)
+        if freed and self.can_generate_chunks_async():
+            # Refill the freed slots straight away rather than waiting for the next chunk update
+            missing = [coords for coords in self.wanted_chunks if coords not in self.generated_chunks and coords not in self.pending_chunks]
+            if len(missing) > 0:
+                self.request_chunk_generation(missing)
+        return self
+
+    def load_chunk(self, coords):
+        if coords not in self.chunks and coords in self.evicted_chunks:
+            storage = self.get_chunk_storage()
+            objects_data = storage.load_chunk(self, coords) if storage is not None else None
+            if objects_data is None:
+                logger.warning(f"Could not load chunk {coords} of space {self.get_id()} from storage, it will be empty!")
+                objects_data = []
+            self.evicted_chunks.discard(coords)
+            self.get_or_create_chunk(coords)
+            for obj_data in objects_data:
+                self.add_obj_from_data(obj_data)
+            # Still the same as what's stored
+            self.dirty_chunks.discard(coords)
+        chunk = self.get_or_create_chunk(coords)
+        if coords not in self.generated_chunks:
+            if self.can_generate_chunks_async():
+                self.request_chunk_generation([coords])
+            else:
+                self.generate_chunk(coords)
+        chunk.touch()
+        return chunk
+
+    def evict_chunk(self, coords):
+        storage = self.get_chunk_storage()
+        chunk = self.chunks.get(coords)
+        if chunk is None or storage is None:
+            return self
+        objects = list(chunk.get_objects())
+        if len(objects) > 0:
+            if coords in self.dirty_chunks or coords not in self.stored_chunks:
+                storage.save_chunk(self, coords, [self.get_obj_data(obj) for obj in objects])
+                self.stored_chunks.add(coords)
+            self.evicted_chunks.add(coords)
+            for obj in objects:
+                self.remove_obj(obj)
+        else:
+            self.stored_chunks.discard(coords)
+        self.dirty_chunks.discard(coords)
+        self.chunks.pop(coords, None)
+        return self
+
+    def update_chunks(self, current_time=None):
+        if current_time is None:
+            current_time = gettime()
+        if self.last_chunk_update is not None and current_time - self.last_chunk_update < self.get_chunk_update_interval():
+            return self
+        self.last_chunk_update = current_time
+        wanted = self.get_wanted_chunk_coords()
+        self.wanted_chunks = wanted
+        self.cancel_unwanted_chunk_generation(wanted)
+        missing = []
+        for coords in wanted:
+            if coords not in self.generated_chunks and self.can_generate_chunks_async():
+                # Queued together below so the closest chunks go first
+                missing.append(coords)
+                self.get_or_create_chunk(coords).touch(current_time)
+            else:
+                self.load_chunk(coords).touch(current_time)
+        if len(missing) > 0:
+            self.request_chunk_generation(missing)
+        if self.get_chunk_storage() is not None and not self.is_chunk_eviction_paused():
+            timeout = self.get_chunk_unload_timeout()
+            for coords, chunk in list(self.chunks.items()):
+                if coords not in wanted and current_time - chunk.get_last_active() > timeout:
+                    self.evict_chunk(coords)
+        return self
+
     def get_gravity_speed(self, m1, m2, distance):
         return ((self.get_g_constant() * m1 * m2) / (distance**2)) / self.get_server().get_max_tickrate()
 
@@ -997,39 +2933,159 @@ class ThreeDimensionalSpace(SpaceGameObject):
     def get_objects(self):
         return self.get_objects_dict().values()
 
+    def get_objects_by_tag(self, tag):
+        return MultiKeyDict.SubkeyView(self.get_objects_dict(), tag)
+
+    def get_tag_count(self, tag):
+        return self.get_objects_dict().get_subkey_count(tag)
+
+    def get_spatial_index(self):
+        return self.spatial_index
+
+    def get_spatial_index_cell_size(self):
+        return 16
+
+    def get_region_index(self):
+        return self.region_index
+
+    def get_obj_store(self):
+        return self.obj_store
+
+    def get_obj_bounds_at_pos(self, obj, pos):
+        # The object's model extent moved to pos, always stretched to hold pos itself so point queries stay exact
+        x, y, z = pos.get_x(), pos.get_y(), pos.get_z()
+        model_bounds = obj.get_model_bounds() if isinstance(obj, SpaceGameObject) else None
+        if model_bounds is None:
+            return (x, y, z, x, y, z)
+        return (min(x + model_bounds[0], x), min(y + model_bounds[1], y), min(z + model_bounds[2], z), max(x + model_bounds[3], x), max(y + model_bounds[4], y), max(z + model_bounds[5], z))
+
+    def update_obj_bounds(self, obj):
+        key = self.get_obj_key(obj)
+        if key is not None:
+            self.get_region_index().update(key, self.get_obj_bounds_at_pos(obj, obj.get_pos()))
+        return self
+
     def get_obj_sets(self):
-        return [[self.get_objects_dict().get(key) for key in self.get_obj_keys_at_pos(pos_key)] for pos_key in self.get_obj_pos_keys()]
+        objects_dict = self.get_objects_dict()
+        return [[objects_dict.get(key) for key in keys] for keys in self.get_spatial_index().get_keys_by_point().values()]
 
     def get_g_constant(self):
         # return 6.67 * (10**-11)
         return 1
 
     def get_obj_pos_keys(self):
-        return [key[:key[0].find("_")] for key in self.get_objects_dict().keys()]
+        return [ThreeDimensionalPosition(*point).to_str() for point in self.get_spatial_index().get_keys_by_point().keys()]
 
     def get_obj_keys_at_pos(self, pos):
-        pos_str = str(pos)
-        return [key for key in self.space_game_obj_sets.keys() if pos_str in str(key)]
+        return self.get_spatial_index().get_keys_at_pos(pos)
+
+    def get_obj_key(self, obj):
+        return self.obj_keys.get(id(obj))
+
+    def contains_obj(self, obj):
+        return id(obj) in self.obj_keys
+
+    def get_free_obj_key(self, pos, additional_keys=[]):
+        pos_str = pos.to_str()
+        objects_dict = self.get_objects_dict()
+        i = len(self.get_obj_keys_at_pos(pos))
+        key = (pos_str, str(i), *additional_keys)
+        while key in objects_dict:
+            i += 1
+            key = (pos_str, str(i), *additional_keys)
+        return key
+
+    def index_obj(self, pos, obj, additional_keys=[]):
+        coords = self.get_chunk_coords(pos)
+        if coords not in self.chunks and coords in self.evicted_chunks:
+            # Bring back what was evicted first, or saving this chunk again would overwrite it
+            self.load_chunk(coords)
+        key = self.get_free_obj_key(pos, additional_keys)
+        self.get_or_create_chunk(coords).add_obj(obj)
+        self.dirty_chunks.add(coords)
+        self.obj_chunks[id(obj)] = coords
+        self.space_game_obj_sets[key] = obj
+        self.get_spatial_index().add(key, pos)
+        self.get_region_index().insert(key, self.get_obj_bounds_at_pos(obj, pos))
+        self.obj_keys[id(obj)] = key
+        return key
+
+    def unindex_obj_key(self, key):
+        obj = self.get_objects_dict().pop(key, None)
+        self.get_spatial_index().remove(key)
+        self.get_region_index().remove(key)
+        if obj is not None:
+            self.obj_keys.pop(id(obj), None)
+            coords = self.obj_chunks.pop(id(obj), None)
+            chunk = self.chunks.get(coords)
+            if chunk is not None:
+                chunk.remove_obj(obj)
+                self.dirty_chunks.add(coords)
+        return obj
+
+    def remove_obj_key(self, key):
+        obj = self.unindex_obj_key(key)
+        if obj is not None:
+            self.get_obj_store().release_obj(obj)
+        return obj
 
     def add_obj_at_pos(self, pos, obj, additional_keys=[]):
         self.obj_lock = True
-        obj.set_pos(pos)
-        obj.set_current_space(self)
-        key = (pos.to_str(), str(len(self.get_obj_keys_at_pos(pos))), *additional_keys)
-        self.space_game_obj_sets[key] = obj
+        if self.contains_obj(obj):
+            self.move_obj(obj, pos)
+        else:
+            obj.set_current_space(self)
+            obj.set_pos(pos)
+            self.get_obj_store().add_obj(obj, pos)
+            self.index_obj(pos, obj, additional_keys)
         self.obj_lock = False
         return self
 
+    def move_obj(self, obj, pos):
+        key = self.get_obj_key(obj)
+        if key is None:
+            obj.pos = pos
+        elif obj.get_pos() != pos:
+            self.unindex_obj_key(key)
+            self.get_obj_store().set_pos(obj.get_store_index(), pos)
+            self.index_obj(pos, obj, key[2:])
+        return self
+
+    def reindex_obj(self, obj):
+        # Brings the indexes up to date with a position that was already written to the object store
+        key = self.get_obj_key(obj)
+        if key is not None:
+            self.unindex_obj_key(key)
+            self.index_obj(obj.get_pos(), obj, key[2:])
+        return self
+
+    def move_objs_by(self, objects, dx, dy, dz):
+        if len(objects) > 0:
+            self.obj_lock = True
+            store = self.get_obj_store()
+            store.offset(store.get_indices_of(objects), dx, dy, dz)
+            for obj in objects:
+                self.reindex_obj(obj)
+            self.obj_lock = False
+        return self
+
+    def remove_obj(self, obj):
+        key = self.get_obj_key(obj)
+        if key is not None:
+            self.obj_lock = True
+            self.remove_obj_key(key)
+            self.obj_lock = False
+        return self
+
     def remove_obj_at_pos(self, pos, check_objects=[]):
         self.obj_lock = True
+        if not isinstance(check_objects, list):
+            check_objects = [check_objects]
         if len(check_objects) > 0:
             for key in self.get_obj_keys_at_pos(pos):
                 obj = self.get_objects_dict().get(key)
-                if obj == check_objects:
-                    self.get_objects_dict.pop(key)
-                elif isinstance(check_objects, list):
-                    if obj in check_objects:
-                        self.get_objects_dict.pop(key)
+                if any(obj is check_obj for check_obj in check_objects):
+                    self.remove_obj_key(key)
         self.obj_lock = False
         return self
 
@@ -1040,8 +3096,10 @@ class ThreeDimensionalSpace(SpaceGameObject):
 
     def get_object_set_at_pos(self, pos, check_objects=[]):
         self.obj_lock = True
-        obj_set = self.get_objects_dict().get(pos.to_str(), [])
+        objects_dict = self.get_objects_dict()
+        obj_set = [objects_dict.get(key) for key in self.get_obj_keys_at_pos(pos)]
         if len(check_objects) == 0:
+            self.obj_lock = False
             return obj_set
         objects = []
         for obj in obj_set:
@@ -1053,25 +3111,23 @@ class ThreeDimensionalSpace(SpaceGameObject):
     def get_object_sets_in_shape(self, shape, check_objects=[], allow_edges=True):
         self.obj_lock = True
         obj_sets = []
-        handled_poses = []
-        for pos_key in self.get_objects_dict().keys():
-            if isinstance(pos_key, tuple):
-                pos_key = pos_key[0]
-            obj_set_pos = ThreeDimensionalPosition.of_str(pos_key)
-            if obj_set_pos not in handled_poses:
-                handled_poses.append(obj_set_pos)
-                if obj_set_pos.is_inside_shape(shape, allow_edges):
-                    obj_set = self.get_object_set_at_pos(obj_set_pos)
-                    if len(obj_set) > 0:
-                        if len(check_objects) == 0:
-                            obj_sets.append(obj_set)
-                        else:
-                            obj_set1 = []
-                            for obj in obj_set:
-                                if obj in check_objects:
-                                    obj_set1.append(obj)
-                            if len(obj_set1) > 0:
-                                obj_sets.append(obj_set1)
+        bounds = shape.get_bounds() if isinstance(shape, ThreeDimensionalCornerHolder) else None
+        if bounds is not None:
+            objects_dict = self.get_objects_dict()
+            keys_by_point = self.get_keys_by_point_for_keys(self.get_region_index().query_bounds(bounds))
+            mask = shape.contains_points(np.array(list(keys_by_point.keys()), dtype=np.float64), allow_edges) if len(keys_by_point) > 0 else []
+            for keys, inside in zip(keys_by_point.values(), mask):
+                if inside:
+                    obj_set = [objects_dict.get(key) for key in keys]
+                    if len(check_objects) == 0:
+                        obj_sets.append(obj_set)
+                    else:
+                        obj_set1 = []
+                        for obj in obj_set:
+                            if obj in check_objects:
+                                obj_set1.append(obj)
+                        if len(obj_set1) > 0:
+                            obj_sets.append(obj_set1)
         self.obj_lock = False
         return obj_sets
 
@@ -1081,25 +3137,92 @@ class ThreeDimensionalSpace(SpaceGameObject):
             objects.extend(obj_set)
         return objects
 
-    def get_nearest_obj_set_to_pos(self, pos, exclusions=[]):
+    def get_exclusion_keys(self, exclusions=[]):
+        exclusion_keys = set()
+        for obj in exclusions:
+            key = self.get_obj_key(obj)
+            if key is not None:
+                exclusion_keys.add(key)
+        return exclusion_keys
+
+    def get_keys_by_point_for_keys(self, keys):
+        spatial_index = self.get_spatial_index()
+        keys_by_point = {}
+        for key in keys:
+            point = spatial_index.get_point(key)
+            point_keys = keys_by_point.get(point)
+            if point_keys is None:
+                keys_by_point[point] = [key]
+            else:
+                point_keys.append(key)
+        return keys_by_point
+
+    def get_nearest_obj_sets_to_pos(self, pos, k=1, exclusions=[], max_distance=None):
         self.obj_lock = True
-        if len(self.get_objects_dict().keys()) > 0:
-            nearest_pos = ThreeDimensionalPosition.of_str(list(self.get_objects_dict().keys())[0])
-            if len(self.get_obj_sets()) > 1:
-                nearest_dist = pos.get_distance_from_other(nearest_pos)
-                if nearest_dist > 0:
-                    for key in self.get_objects_dict().keys():
-                        if len(self.get_object_set_at_pos(nearest_pos, exclusions)) > 0:
-                            check_pos = ThreeDimensionalPosition.of_str(key)
-                            check_dist = pos.get_distance_from_other(check_pos)
-                            if check_dist < nearest_dist:
-                                nearest_pos = check_pos
-                                nearest_dist = check_dist
-            self.obj_lock = False
-            return self.get_object_set_at_pos(nearest_pos, exclusions), nearest_pos
+        objects_dict = self.get_objects_dict()
+        spatial_index = self.get_spatial_index()
+        obj_sets = []
+        set_points = {}
+        if k > 0:
+            for dist, key in self.get_region_index().iter_nearest((pos.get_x(), pos.get_y(), pos.get_z()), self.get_exclusion_keys(exclusions), max_distance, spatial_index.get_point):
+                point = spatial_index.get_point(key)
+                obj_set = set_points.get(point)
+                if obj_set is None:
+                    if len(obj_sets) >= k:
+                        # Keys further than the last set found can't share a position with any of the sets
+                        if dist > last_dist:
+                            break
+                        continue
+                    last_dist = dist
+                    obj_set = []
+                    set_points[point] = obj_set
+                    obj_sets.append((obj_set, ThreeDimensionalPosition(*point)))
+                obj_set.append(objects_dict.get(key))
         self.obj_lock = False
+        return obj_sets
+
+    def get_nearest_obj_set_to_pos(self, pos, exclusions=[]):
+        nearest = self.get_nearest_obj_sets_to_pos(pos, 1, exclusions)
+        if len(nearest) > 0:
+            return nearest[0]
         return None, None
 
+    def get_objects_in_radius(self, pos, radius, exclusions=[]):
+        self.obj_lock = True
+        objects_dict = self.get_objects_dict()
+        objects = [objects_dict.get(key) for key in self.get_region_index().query_radius((pos.get_x(), pos.get_y(), pos.get_z()), radius, self.get_exclusion_keys(exclusions), self.get_spatial_index().get_point)]
+        self.obj_lock = False
+        return objects
+
+    def get_objects_in_frustum(self, frustum, exclusions=[]):
+        # Culls by each object's whole extent, not just its position
+        self.obj_lock = True
+        objects = []
+        region_index = self.get_region_index()
+        exclusion_keys = self.get_exclusion_keys(exclusions)
+        keys = [key for key in region_index.query_bounds(frustum.get_bounds()) if key not in exclusion_keys]
+        if len(keys) > 0:
+            objects_dict = self.get_objects_dict()
+            mask = frustum.intersects_bounds_array(np.array([region_index.get_bounds(key) for key in keys], dtype=np.float64))
+            objects = [objects_dict.get(key) for key, inside in zip(keys, mask) if inside]
+        self.obj_lock = False
+        return objects
+
+    def get_object_sets_in_bounds(self, bounds, exclusions=[]):
+        self.obj_lock = True
+        objects_dict = self.get_objects_dict()
+        exclusion_keys = self.get_exclusion_keys(exclusions)
+        keys = [key for key in self.get_region_index().query_bounds(bounds) if key not in exclusion_keys]
+        obj_sets = [[objects_dict.get(key) for key in point_keys] for point_keys in self.get_keys_by_point_for_keys(keys).values()]
+        self.obj_lock = False
+        return obj_sets
+
+    def get_objects_in_bounds(self, bounds, exclusions=[]):
+        objects = []
+        for obj_set in self.get_object_sets_in_bounds(bounds, exclusions):
+            objects.extend(obj_set)
+        return objects
+
     def get_heaviest_objects_in_set(self, obj_set):
         self.obj_lock = True
         if len(obj_set) > 0:
@@ -1123,23 +3246,71 @@ class ThreeDimensionalSpace(SpaceGameObject):
         return 0
 
     def tick_object_gravity(self, obj):
-        if len(self.get_obj_sets()) > 1 and obj.has_gravity():
+        if len(self.get_spatial_index()) > 1 and obj.has_gravity():
             nearest_set, nearest_pos = self.get_nearest_obj_set_to_pos(obj.get_pos(), [obj])
             if nearest_set is not None and nearest_pos != obj.get_pos():
                 if len(nearest_set) > 0:
                     mass = self.get_mass_of_set(nearest_set)
                     if mass > 0:
-                        obj.set_pos(obj.get_pos().approach(nearest_pos, self.get_gravity_speed(obj.get_mass(), mass, nearest_pos.get_distance_from_other(obj.get_pos()))))
+                        distance = nearest_pos.get_distance_from_other(obj.get_pos())
+                        # Never carry an object past the set it's falling towards
+                        obj.set_pos(obj.get_pos().approach(nearest_pos, min(self.get_gravity_speed(obj.get_mass(), mass, distance), distance)))
+        return self
+
+    def tick_gravity_barnes_hut(self, objects):
+        store = self.get_obj_store()
+        indices = store.get_indices_of(objects)
+        store.update_masses(indices)
+        xs, ys, zs, masses = store.x[indices], store.y[indices], store.z[indices], store.mass[indices]
+        xl, yl, zl = xs.tolist(), ys.tolist(), zs.tolist()
+        tree = ThreeDimensionalMassOctree(list(zip(range(len(objects)), xl, yl, zl, masses.tolist())), self.get_gravity_opening_angle())
+        # The tree walk gathers every (object, attractor) pair, then the forces are summed in one batch
+        targets, attractor_masses, attractor_xs, attractor_ys, attractor_zs = [], [], [], [], []
+        for i, obj in enumerate(objects):
+            if obj.has_gravity():
+                for mass, ax, ay, az in tree.iter_attractors(i, xl[i], yl[i], zl[i]):
+                    targets.append(i)
+                    attractor_masses.append(mass)
+                    attractor_xs.append(ax)
+                    attractor_ys.append(ay)
+                    attractor_zs.append(az)
+        if len(targets) > 0:
+            targets = np.array(targets, dtype=np.intp)
+            dx = np.array(attractor_xs) - xs[targets]
+            dy = np.array(attractor_ys) - ys[targets]
+            dz = np.array(attractor_zs) - zs[targets]
+            distances = np.sqrt(dx*dx + dy*dy + dz*dz)
+            safe_distances = np.where(distances > 0, distances, 1)
+            steps = np.where(distances > 0, np.minimum(self.get_gravity_speed(masses[targets], np.array(attractor_masses), safe_distances), distances) / safe_distances, 0)
+            count = len(objects)
+            store.set_velocities(indices, np.bincount(targets, dx*steps, count), np.bincount(targets, dy*steps, count), np.bincount(targets, dz*steps, count))
+        else:
+            store.set_velocities(indices, 0, 0, 0)
+        # Positions are only applied once every force has been summed, so the result doesn't depend on tick order
+        for index in store.integrate(indices).tolist():
+            self.reindex_obj(store.get_obj(index))
         return self
 
     def tick(self):
         if self.obj_lock:
             while self.obj_lock:
                 sleep(0.0001)
-        for obj_set in self.get_obj_sets():
-            for obj in obj_set:
-                obj.tick()
-                self.tick_object_gravity(obj)
+        # Background generation results only enter the space here, between ticks
+        self.merge_generated_chunks()
+        self.update_chunks()
+        if self.get_gravity_mode() == ThreeDimensionalSpace.GravityModes.BARNES_HUT:
+            objects = []
+            for obj_set in self.get_obj_sets():
+                for obj in obj_set:
+                    obj.tick()
+                    objects.append(obj)
+            if len(objects) > 1:
+                self.tick_gravity_barnes_hut(objects)
+        else:
+            for obj_set in self.get_obj_sets():
+                for obj in obj_set:
+                    obj.tick()
+                    self.tick_object_gravity(obj)
         return self
 
     @dataclass(frozen=True)
@@ -1148,37 +3319,93 @@ class ThreeDimensionalSpace(SpaceGameObject):
         POS = "pos"
         DATA = "data"
         OBJECTS = "objects"
+        CHUNK_SIZE = "chunk_size"
+        SEED = "seed"
+        GENERATED_CHUNKS = "generated_chunks"
+        EVICTED_CHUNKS = "evicted_chunks"
+        STORED_CHUNKS = "stored_chunks"
+        LOADED_CHUNKS = "loaded_chunks"
+
+    def add_obj_from_data(self, obj_data):
+        if ThreeDimensionalSpace.SaveDataKeys.IDE in obj_data.keys() and ThreeDimensionalSpace.SaveDataKeys.POS in obj_data.keys():
+            ide = Identifier(obj_data[ThreeDimensionalSpace.SaveDataKeys.IDE])
+            obj_pair = self.get_server().get_registry().get_entry(ide)
+            if obj_pair is not None:
+                obj = obj_pair.get_obj()
+                if obj is not None:
+                    pos = ThreeDimensionalPosition.of_dict(obj_data[ThreeDimensionalSpace.SaveDataKeys.POS])
+                    obj.set_pos(pos)
+                    obj.set_data(obj_data.get(ThreeDimensionalSpace.SaveDataKeys.DATA))
+                    self.add_obj_at_pos(pos, obj)
+                    return obj
+        return None
+
+    def get_obj_data(self, obj):
+        obj_data = {}
+        obj_data[ThreeDimensionalSpace.SaveDataKeys.IDE] = obj.get_id().get_path_str()
+        obj_data[ThreeDimensionalSpace.SaveDataKeys.POS] = obj.get_pos().to_dict()
+        obj_data[ThreeDimensionalSpace.SaveDataKeys.DATA] = obj.get_data()
+        return obj_data
 
     def set_data(self, data):
+        if ThreeDimensionalSpace.SaveDataKeys.CHUNK_SIZE in data.keys() and len(self.obj_chunks) == 0:
+            # Saved chunk coordinates only line up with the size they were made with
+            self.chunk_size = data.get(ThreeDimensionalSpace.SaveDataKeys.CHUNK_SIZE)
+        if ThreeDimensionalSpace.SaveDataKeys.SEED in data.keys():
+            self.set_seed(data.get(ThreeDimensionalSpace.SaveDataKeys.SEED))
+        if ThreeDimensionalSpace.SaveDataKeys.GENERATED_CHUNKS in data.keys():
+            self.generated_chunks.update(tuple(coords) for coords in data.get(ThreeDimensionalSpace.SaveDataKeys.GENERATED_CHUNKS))
+        if ThreeDimensionalSpace.SaveDataKeys.EVICTED_CHUNKS in data.keys():
+            self.evicted_chunks.update(tuple(coords) for coords in data.get(ThreeDimensionalSpace.SaveDataKeys.EVICTED_CHUNKS))
+            self.stored_chunks.update(self.evicted_chunks)
+        if ThreeDimensionalSpace.SaveDataKeys.STORED_CHUNKS in data.keys():
+            # Stored chunks start out evicted, the ones that were loaded when saving are read back right away
+            stored_chunks = [tuple(coords) for coords in data.get(ThreeDimensionalSpace.SaveDataKeys.STORED_CHUNKS)]
+            self.stored_chunks.update(stored_chunks)
+            self.evicted_chunks.update(coords for coords in stored_chunks if coords not in self.chunks)
+            for coords in data.get(ThreeDimensionalSpace.SaveDataKeys.LOADED_CHUNKS, []):
+                self.load_chunk(tuple(coords))
         if ThreeDimensionalSpace.SaveDataKeys.OBJECTS in data.keys():
             objects_data = data.get(ThreeDimensionalSpace.SaveDataKeys.OBJECTS)
             for obj_set_data in objects_data.values():
-                for obj_data in obj_set_data:
-                    if ThreeDimensionalSpace.SaveDataKeys.IDE in obj_data.keys() and ThreeDimensionalSpace.SaveDataKeys.POS in obj_data.keys():
-                        ide = Identifier(obj_data[ThreeDimensionalSpace.SaveDataKeys.IDE])
-                        obj_pair = self.get_server().get_registry().get_entry(ide)
-                        if obj_pair is not None:
-                            obj = obj_pair.get_obj()
-                            if obj is not None:
-                                pos = ThreeDimensionalPosition.of_dict(obj_data[ThreeDimensionalSpace.SaveDataKeys.POS])
-                                obj.set_pos(pos)
-                                obj.set_data(obj_data.get(ThreeDimensionalSpace.SaveDataKeys.DATA))
-                                self.add_obj_at_pos(pos, obj)
+                for obj_data in (obj_set_data if isinstance(obj_set_data, list) else [obj_set_data]):
+                    self.add_obj_from_data(obj_data)
 
     def get_data(self):
         data = super().get_data()
         objects_data = {}
         for i, obj in self.get_objects_dict().items():
             if obj is not None:
-                ide_path_str = obj.get_id().get_path_str()
-                pos_dict = obj.get_pos().to_dict()
-                saved_data = obj.get_data()
-                obj_data = {}
-                obj_data[ThreeDimensionalSpace.SaveDataKeys.IDE] = ide_path_str
-                obj_data[ThreeDimensionalSpace.SaveDataKeys.POS] = pos_dict
-                obj_data[ThreeDimensionalSpace.SaveDataKeys.DATA] = saved_data
-                objects_data[str(i)] = obj_data
+                objects_data[str(i)] = self.get_obj_data(obj)
         data[ThreeDimensionalSpace.SaveDataKeys.OBJECTS] = objects_data
+        return self.add_chunk_data(data)
+
+    def iter_data(self, incremental=False):
+        # The space's own data first, then one record per object, so the whole space's data never exists at once
+        if incremental and self.get_chunk_storage() is not None:
+            yield self.get_incremental_data()
+            return
+        yield self.add_chunk_data(super().get_data())
+        for obj in list(self.get_objects()):
+            if obj is not None:
+                yield self.get_obj_data(obj)
+
+    def get_incremental_data(self):
+        # Only dirty chunks get serialized, into chunk storage, the returned data just lists which chunks to read back
+        if self.get_chunk_storage() is None:
+            return self.get_data()
+        self.save_dirty_chunks()
+        data = super().get_data()
+        data[ThreeDimensionalSpace.SaveDataKeys.STORED_CHUNKS] = [list(coords) for coords in self.stored_chunks]
+        data[ThreeDimensionalSpace.SaveDataKeys.LOADED_CHUNKS] = [list(coords) for coords in self.stored_chunks if coords in self.chunks]
+        return self.add_chunk_data(data)
+
+    def add_chunk_data(self, data):
+        # Evicted chunks stay in chunk storage, the save only records which ones are there
+        data[ThreeDimensionalSpace.SaveDataKeys.CHUNK_SIZE] = self.get_chunk_size()
+        data[ThreeDimensionalSpace.SaveDataKeys.SEED] = self.get_seed()
+        data[ThreeDimensionalSpace.SaveDataKeys.GENERATED_CHUNKS] = [list(coords) for coords in self.generated_chunks]
+        data[ThreeDimensionalSpace.SaveDataKeys.EVICTED_CHUNKS] = [list(coords) for coords in self.evicted_chunks]
         return data
 
 
@@ -1186,6 +3413,11 @@ class BaseServer(MainGameObject):
     spaces_key = "spaces"
     spawn_space_key = "spawn_space"
     spawn_pos_key = "spawn_pos"
+    space_keys_key = "space_keys"
+    active_spaces_key = "active_spaces"
+    world_record_tag = "world"
+    space_record_tag = "space"
+    object_record_tag = "object"
 
     def __init__(self, ide, registry):
         super().__init__(ide, self)
@@ -1193,6 +3425,35 @@ class BaseServer(MainGameObject):
         self.registry = registry
         self.registry.server = self
         self.spaces = {}
+        self.unloaded_spaces = set()
+        self.space_last_active = {}
+        self.space_storage = None
+        self.set_space_unload_timeout(300)
+
+    class SpaceStorage():
+        # Where unloaded spaces go, as the same records iter_space_records makes, servers without one keep every space loaded
+        def has_space(self, server, space_key):
+            return False
+
+        def save_space(self, server, space_key, records):
+            return False
+
+        def load_space(self, server, space_key):
+            return None
+
+    def set_space_storage(self, storage):
+        self.space_storage = storage
+        return self
+
+    def get_space_storage(self):
+        return self.space_storage
+
+    def set_space_unload_timeout(self, timeout=300):
+        self.space_unload_timeout = timeout
+        return self
+
+    def get_space_unload_timeout(self):
+        return self.space_unload_timeout
 
     def get_registry(self):
         return self.registry
@@ -1208,7 +3469,84 @@ class BaseServer(MainGameObject):
         return self
 
     def get_space(self, ide):
-        return self.spaces.get(ide.get_path_str(), None)
+        space_key = ide.get_path_str()
+        space = self.spaces.get(space_key, None)
+        if space is None and space_key in self.unloaded_spaces:
+            space = self.load_space(space_key)
+        return space
+
+    def get_or_create_space(self, space_key):
+        space = self.get_space(Identifier(space_key))
+        if space is None:
+            space = self.get_registry().get_entry(Identifier(space_key)).get_obj()
+            self.add_space(space)
+        return space
+
+    def get_unloaded_spaces(self):
+        return self.unloaded_spaces
+
+    def is_space_loaded(self, space_key):
+        return space_key in self.spaces
+
+    def get_space_keys(self):
+        return list(self.spaces.keys()) + [space_key for space_key in self.unloaded_spaces if space_key not in self.spaces]
+
+    def load_space(self, space_key):
+        storage = self.get_space_storage()
+        records = storage.load_space(self, space_key) if storage is not None else None
+        self.unloaded_spaces.discard(space_key)
+        space = self.get_registry().get_entry(Identifier(space_key)).get_obj()
+        # Added before its records are read so that they find it instead of loading it again
+        self.add_space(space)
+        self.space_last_active[space_key] = gettime()
+        if records is None:
+            logger.warning(f"Could not load space {space_key} from storage, it will be empty!")
+        else:
+            self.set_data_from_records(records)
+        return space
+
+    def can_unload_spaces(self):
+        return self.get_space_storage() is not None
+
+    def unload_space(self, space_key):
+        space = self.spaces.get(space_key)
+        storage = self.get_space_storage()
+        if space is None or storage is None:
+            return False
+        space.cancel_unwanted_chunk_generation(set())
+        if not storage.save_space(self, space_key, self.iter_space_records(space_key, space, True)):
+            logger.warning(f"Failed to save space {space_key}, it will stay loaded")
+            return False
+        self.spaces.pop(space_key, None)
+        self.space_last_active.pop(space_key, None)
+        self.unloaded_spaces.add(space_key)
+        return True
+
+    def is_space_kept_loaded(self, space_key, space):
+        return space.is_active() or space_key == self.get_spawn_space_id().get_path_str()
+
+    def update_space_unloading(self, current_time=None):
+        if current_time is None:
+            current_time = gettime()
+        timeout = self.get_space_unload_timeout()
+        for space_key, space in list(self.spaces.items()):
+            if self.is_space_kept_loaded(space_key, space):
+                self.space_last_active[space_key] = current_time
+            elif current_time - self.space_last_active.setdefault(space_key, current_time) >= timeout and self.can_unload_spaces():
+                self.unload_space(space_key)
+        return self
+
+    def transfer_obj(self, obj, space_ide, pos):
+        # Loads the target space if it was unloaded
+        space = self.get_space(space_ide)
+        if space is None:
+            logger.warning(f"Could not move {obj.get_id()} to missing space {space_ide}!")
+            return None
+        current_space = obj.get_current_space()
+        if current_space is not None and current_space is not space:
+            current_space.remove_obj(obj)
+        space.add_obj_at_pos(pos, obj)
+        return space
 
     def set_spawn_space(self, space_id):
         self.spawn_space_id = space_id
@@ -1228,17 +3566,24 @@ class BaseServer(MainGameObject):
     def tick(self):
         for space in self.get_spaces():
             space.tick()
+        self.update_space_unloading()
         return self
 
     def set_data(self, data):
         super().set_data(data)
+        if self.space_keys_key in data.keys() and self.get_space_storage() is not None:
+            # Only spaces that were active when saving are read now, the rest wait for get_space
+            active_spaces = data.get(self.active_spaces_key, [])
+            for space_key in data.get(self.space_keys_key):
+                if space_key not in self.spaces:
+                    self.unloaded_spaces.add(space_key)
+            for space_key in active_spaces:
+                if space_key in self.unloaded_spaces:
+                    self.load_space(space_key)
         if self.spaces_key in data.keys():
             spaces_data = data.get(self.spaces_key)
             for space_key in spaces_data.keys():
-                space_ide = Identifier(space_key)
-                if space_key not in self.get_spaces_dict().keys():
-                    self.add_space(self.get_registry().get_entry(space_ide).get_obj())
-                self.get_space(space_ide).set_data(spaces_data.get(space_key))
+                self.get_or_create_space(space_key).set_data(spaces_data.get(space_key))
         if self.spawn_space_key in data.keys():
             self.set_spawn_space(Identifier(data.get(self.spawn_space_key)))
         if self.spawn_pos_key in data.keys():
@@ -1246,12 +3591,60 @@ class BaseServer(MainGameObject):
         return self
 
     def get_data(self):
-        data = super().get_data()
+        return self.get_spaces_data(False)
+
+    def get_incremental_data(self):
+        return self.get_spaces_data(True)
+
+    def get_spaces_data(self, incremental=False):
+        data = self.get_world_meta_data()
         spaces_data = {}
         for space in self.get_spaces_dict().values():
-            spaces_data[space.get_id().get_path_str()] = space.get_data()
+            spaces_data[space.get_id().get_path_str()] = space.get_incremental_data() if incremental else space.get_data()
         data[self.spaces_key] = spaces_data
+        return data
+
+    def get_world_meta_data(self):
+        data = super().get_data()
         data[self.spawn_space_key] = self.get_spawn_space_id().get_path()
         data[self.spawn_pos_key] = self.get_spawn_pos().to_dict()
+        data[self.space_keys_key] = self.get_space_keys()
+        data[self.active_spaces_key] = [space_key for space_key, space in self.spaces.items() if self.is_space_kept_loaded(space_key, space)]
         return data
 
+    def get_world_record(self):
+        return (self.world_record_tag, self.get_world_meta_data())
+
+    def set_world_meta_data(self, data):
+        return self.set_data(data)
+
+    def iter_records(self, incremental=False):
+        # (tag, data) records, a world record first and then every space followed by its objects
+        yield self.get_world_record()
+        for space_key, space in list(self.get_spaces_dict().items()):
+            yield from self.iter_space_records(space_key, space, incremental)
+
+    def iter_space_records(self, space_key, space, incremental=False):
+        space_data = space.iter_data(incremental)
+        yield (self.space_record_tag, space_key, next(space_data))
+        for obj_data in space_data:
+            yield (self.object_record_tag, obj_data)
+
+    def set_data_from_records(self, records):
+        # Objects are created as their records come in, so records can be read lazily from a file
+        space = None
+        for record in records:
+            if record[0] == self.world_record_tag:
+                self.set_world_meta_data(record[1])
+            elif record[0] == self.space_record_tag:
+                space = self.get_or_create_space(record[1])
+                space.set_data(record[2])
+            elif record[0] == self.object_record_tag:
+                if space is None:
+                    logger.warning("Found an object record before any space record, skipping it!")
+                else:
+                    space.add_obj_from_data(record[1])
+            else:
+                logger.warning(f"Unknown world record {record[0]}, skipping it!")
+        return self
+
@@ -29,12 +29,22 @@ SOFTWARE.
 
 import sys #, uuid
 from dataclasses import dataclass
+from copy import deepcopy
+from threading import Thread, RLock
 from time import time as gettime
-from os import path as ospath, makedirs, mknod
+from random import getrandbits
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from itertools import chain
+from struct import Struct
+from mmap import mmap, ACCESS_READ
+from zlib import compress, decompress
+from os import path as ospath, makedirs, replace as osreplace, remove as osremove, fsync, pipe, fdopen, close as osclose
+import os # fork and friends only exist on some platforms
 #from msgpack import pack as mpack, unpack as munpack
 from json import dumps as jdumps, loads as jloads
 from pickle import dump as pkldump, load as pklload
-from saoirse_lib import saoirse_lib_version, saoirse_id, saoirse_images_path, logger, expand_full_path, Identifier, IdentifierEnum, MultiKeyDict, BaseRegistry, Item, ThreeDimensionalPosition, ThreeDimensionalSpace, Tile, Fluid, Entity, BaseServer, ThreeDimensionalShape
+from saoirse_lib import saoirse_lib_version, saoirse_id, saoirse_images_path, logger, expand_full_path, Identifier, IdentifierEnum, MultiKeyDict, BaseRegistry, Item, ThreeDimensionalPosition, ThreeDimensionalSpace, Tile, Fluid, Entity, BaseServer, ThreeDimensionalShape, BinaryCodec
 
 
 saoirse_server_version = "0.0.1"
@@ -59,7 +69,13 @@ class SaoirseThreeDimensionalSpace(ThreeDimensionalSpace):
         return super().add_obj_at_pos(pos, obj, additional_keys=[self.DataKeys.player_key] if isinstance(obj, Entities.PlayerEntity) else [])
 
     def get_players(self):
-        return self.space_game_obj_sets.get(self.DataKeys.player_key, [])
+        return self.get_objects_by_tag(self.DataKeys.player_key)
+
+    def get_chunk_anchor_positions(self):
+        return [player.get_pos() for player in self.get_players()]
+
+    def get_player_count(self):
+        return self.get_tag_count(self.DataKeys.player_key)
 
 
 class Items:
@@ -67,7 +83,7 @@ class Items:
         def get_mass(self):
             return 999999999999
 
-        def get_model(self):
+        def create_model(self):
             return ThreeDimensionalShape(boxes=[ThreeDimensionalShape.ThreeDimensionalBox.rectangular_prism(ThreeDimensionalPosition(0, 0, 1), ThreeDimensionalPosition(1, 0, 1), ThreeDimensionalPosition(1, 0, 0), ThreeDimensionalPosition(0, 0, 0), ThreeDimensionalPosition(0, 1, 1), ThreeDimensionalPosition(1, 1, 1), ThreeDimensionalPosition(1, 1, 0), ThreeDimensionalPosition(0, 1, 0), tex_default=saoirse_images_path.append("pic1.png"))])
 
     class Equipment:
@@ -100,7 +116,7 @@ class Items:
                 def __init__(self, ide, server, pos=ThreeDimensionalPosition.get_origin(), space=None, integrity=300):
                     super().__init__(ide, server, pos=pos, space=space, integrity=integrity)
 
-                def get_model(self):
+                def create_model(self):
                     return Items.Equipment.Tools.HatchetItem.HatchetItemShape()
 
                 def get_mass(self):
@@ -108,6 +124,7 @@ class Items:
 
                 class HatchetItemShape(Item.BaseItemShape):
                     def __init__(self, boxes=[]):
+                        boxes = boxes.copy()
                         boxes.extend([
                             ThreeDimensionalShape.ThreeDimensionalBox.rectangular_prism(ThreeDimensionalPosition(0, 0, 1), ThreeDimensionalPosition(1, 0, 1), ThreeDimensionalPosition(1, 0, 0), ThreeDimensionalPosition(0, 0, 0), ThreeDimensionalPosition(0, 1, 1), ThreeDimensionalPosition(1, 1, 1), ThreeDimensionalPosition(1, 1, 0), ThreeDimensionalPosition(0, 1, 0), tex_default=saoirse_images_path.append("pic2.png")),
                             ThreeDimensionalShape.ThreeDimensionalBox.rectangular_prism(ThreeDimensionalPosition(1, 1, 11), ThreeDimensionalPosition(3, 1, 9), ThreeDimensionalPosition(1, 1, 3.25), ThreeDimensionalPosition(3, 1, 3.25), ThreeDimensionalPosition(1, 1.5, 9), ThreeDimensionalPosition(3, 1.5, 9), ThreeDimensionalPosition(1, 1.5, 3.25), ThreeDimensionalPosition(3, 1.5, 3.25), tex_default=saoirse_images_path.append("pic1.png")),
@@ -144,25 +161,41 @@ class Entities:
             return data
 
 
+# Chunk generation tasks run in worker processes, so they only get plain values and return (ide path str, x, y, z) records
+# They run once per chunk, so each one only makes what belongs to the chunk at origin, the test objects below are tied to the (0, 0, 0) chunk
+def generate_normal_space_chunk(origin, chunk_size, seed):
+    payload = []
+    ox, oy, oz = origin
+    # TEST - adding objects
+    if origin == (0, 0, 0):
+        payload.append((SaoirseRegistry.Identifiers.ITEMS.hatchet.get_identifier().get_path_str(), ox + 3, oy + 3, oz + 2))
+        payload.append((SaoirseRegistry.Identifiers.ITEMS.canvas_sheet.get_identifier().get_path_str(), ox + 2, oy + 3, oz + 70))
+    return payload
+
+
+def generate_ghostly_space_chunk(origin, chunk_size, seed):
+    payload = []
+    ox, oy, oz = origin
+    # TEST - adding objects
+    if origin == (0, 0, 0):
+        payload.append((SaoirseRegistry.Identifiers.ITEMS.hatchet.get_identifier().get_path_str(), ox + 1, oy + 5, oz + 1))
+    return payload
+
+
 class Spaces:
     class NormalSpace(SaoirseThreeDimensionalSpace):
         def __init__(self, server):
             super().__init__(SaoirseRegistry.Identifiers.SPACES.normal.get_identifier(), server)
 
-        def generate_terrain_at_pos(self, pos=ThreeDimensionalPosition.get_origin()):
-            # TEST - adding objects
-            if pos == ThreeDimensionalPosition.get_origin():
-                self.add_obj_at_pos(pos.get_relative(ThreeDimensionalPosition(3, 3, 2)), self.get_server().get_registry().get_entry(SaoirseRegistry.Identifiers.ITEMS.hatchet.get_identifier()).get_obj())
-                self.add_obj_at_pos(pos.get_relative(ThreeDimensionalPosition(2, 3, 70)), self.get_server().get_registry().get_entry(SaoirseRegistry.Identifiers.ITEMS.canvas_sheet.get_identifier()).get_obj())
+        def get_chunk_generation_task(self):
+            return generate_normal_space_chunk
 
     class GhostlySpace(SaoirseThreeDimensionalSpace):
         def __init__(self, server):
             super().__init__(SaoirseRegistry.Identifiers.SPACES.ghostly.get_identifier(), server)
 
-        def generate_terrain_at_pos(self, pos=ThreeDimensionalPosition.get_origin()):
-            # TEST - adding objects
-            if pos == ThreeDimensionalPosition.get_origin():
-                self.add_obj_at_pos(pos.get_relative(ThreeDimensionalPosition(1, 5, 1)), self.get_server().get_registry().get_entry(SaoirseRegistry.Identifiers.ITEMS.hatchet.get_identifier()).get_obj())
+        def get_chunk_generation_task(self):
+            return generate_ghostly_space_chunk
 
 
 class SaoirseRegistry(BaseRegistry):
@@ -185,9 +218,9 @@ class SaoirseRegistry(BaseRegistry):
             ide = idee.get_identifier()
             item_obj = None
             if ide == SaoirseRegistry.Identifiers.ITEMS.hatchet.get_identifier():
-                item_obj = lambda : Items.Equipment.Tools.HatchetItem(server=self.get_server(), ide=ide)
+                item_obj = lambda ide=ide: Items.Equipment.Tools.HatchetItem(server=self.get_server(), ide=ide)
             elif ide == SaoirseRegistry.Identifiers.ITEMS.canvas_sheet.get_identifier():
-                item_obj = lambda : Items.CanvasSheetItem(server=self.get_server(), ide=ide)
+                item_obj = lambda ide=ide: Items.CanvasSheetItem(server=self.get_server(), ide=ide)
             self.register_item(ide, item_obj)
 
     def register_item(self, ide, item_obj=None):
@@ -324,6 +357,240 @@ class SaoirseRegistry(BaseRegistry):
             ghostly = "ghostly"
 
 
+class SaoirseRegionFile():
+    # A region_size cube of chunks in one file: a header, a table of (offset, length, capacity) per chunk, then
+    # zlib compressed records. Each chunk gets two slots of capacity bytes next to each other, a rewrite goes into the slot
+    # not holding the current record and the table entry is switched after it, so a torn write leaves the old record readable.
+    # Records that outgrow their slots get a new pair at the end. Entries written before slots were paired have no flags
+    # and get a pair on their next write
+    # Version 1 files hold JSON records and keep being written that way, version 2 files hold BinaryCodec records
+    magic = b"SREG"
+    version = 2
+    readable_versions = (1, 2)
+    region_size = 8
+    sector_size = 4096
+    header_struct = Struct("<4sHH")
+    entry_struct = Struct("<QII")
+    paired_flag = 1 << 31
+    second_slot_flag = 1 << 30
+    capacity_mask = second_slot_flag - 1
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = None
+        self.map = None
+        self.file_version = self.version
+        # Autosaves write chunks from another thread
+        self.lock = RLock()
+
+    def get_file_path(self):
+        return self.file_path
+
+    def get_chunk_count():
+        return SaoirseRegionFile.region_size**3
+
+    def get_table_size():
+        return SaoirseRegionFile.header_struct.size + SaoirseRegionFile.get_chunk_count() * SaoirseRegionFile.entry_struct.size
+
+    def get_region_coords(coords):
+        size = SaoirseRegionFile.region_size
+        return (coords[0] // size, coords[1] // size, coords[2] // size)
+
+    def get_chunk_index(coords):
+        size = SaoirseRegionFile.region_size
+        return (coords[0] % size) + (coords[1] % size) * size + (coords[2] % size) * size * size
+
+    def get_chunk_coords(region_coords, index):
+        size = SaoirseRegionFile.region_size
+        return (region_coords[0] * size + index % size, region_coords[1] * size + (index // size) % size, region_coords[2] * size + index // (size * size))
+
+    def exists(self):
+        return self.file is not None or ospath.isfile(self.get_file_path())
+
+    def open(self, create=False):
+        if self.file is None:
+            if not ospath.isfile(self.get_file_path()):
+                if not create:
+                    return False
+                file_dir = ospath.dirname(self.get_file_path())
+                if file_dir != "" and not ospath.isdir(file_dir):
+                    makedirs(file_dir)
+                with open(self.get_file_path(), "wb") as f:
+                    f.write(self.header_struct.pack(self.magic, self.version, self.region_size))
+                    f.write(bytes(SaoirseRegionFile.get_table_size() - self.header_struct.size))
+            self.file = open(self.get_file_path(), "r+b")
+            magic, version, region_size = self.header_struct.unpack(self.file.read(self.header_struct.size))
+            if magic != self.magic or version not in self.readable_versions or region_size != self.region_size:
+                self.close()
+                raise ValueError(f"{self.get_file_path()} is not a version {self.version} region file")
+            self.file_version = version
+        return True
+
+    def get_map(self):
+        # Reads go through a read only map of the whole file, so only the pages of the requested chunks are touched
+        if self.map is None:
+            self.map = mmap(self.file.fileno(), 0, access=ACCESS_READ)
+        return self.map
+
+    def get_entry(self, index):
+        return self.entry_struct.unpack_from(self.get_map(), self.header_struct.size + index * self.entry_struct.size)
+
+    def has_chunk(self, index):
+        with self.lock:
+            return self.open() and self.get_entry(index)[1] > 0
+
+    def read_record(self, index):
+        with self.lock:
+            if not self.open():
+                return None
+            offset, length, capacity = self.get_entry(index)
+            if length == 0:
+                return None
+            if offset + length > len(self.get_map()):
+                # Another handle, like a forked autosave's, grew the file since it was mapped
+                self.close_map()
+            record = self.get_map()[offset:offset + length]
+        return decompress(record)
+
+    def write_record(self, index, record):
+        with self.lock:
+            self.open(True)
+            offset, length, flags = self.get_entry(index)
+            capacity = flags & self.capacity_mask
+            if flags & self.paired_flag and len(record) <= capacity:
+                second_slot = not flags & self.second_slot_flag
+                offset = offset + capacity if second_slot else offset - capacity
+            else:
+                self.file.seek(0, 2)
+                offset = self.file.tell()
+                capacity = -(-len(record) // self.sector_size) * self.sector_size
+                second_slot = False
+                self.file.write(bytes(2 * capacity))
+                self.close_map()
+            self.file.seek(offset)
+            self.file.write(record)
+            # The record has to be written out before the table entry points at it
+            self.file.flush()
+            flags = capacity | self.paired_flag | (self.second_slot_flag if second_slot else 0)
+            self.file.seek(self.header_struct.size + index * self.entry_struct.size)
+            self.file.write(self.entry_struct.pack(offset, len(record), flags))
+            self.file.flush()
+        return self
+
+    def sync(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                fsync(self.file.fileno())
+        return self
+
+    def read_chunk(self, coords):
+        record = self.read_record(SaoirseRegionFile.get_chunk_index(coords))
+        if record is None:
+            return None
+        return jloads(record.decode()) if self.file_version == 1 else BinaryCodec.decode(record)
+
+    def write_chunk(self, coords, data):
+        with self.lock:
+            self.open(True)
+            record = jdumps(data, separators=(",", ":")).encode() if self.file_version == 1 else BinaryCodec.encode(data)
+            return self.write_record(SaoirseRegionFile.get_chunk_index(coords), compress(record))
+
+    def read_chunks(self, region_coords):
+        chunks = {}
+        if self.open():
+            for index in range(SaoirseRegionFile.get_chunk_count()):
+                if self.get_entry(index)[1] > 0:
+                    coords = SaoirseRegionFile.get_chunk_coords(region_coords, index)
+                    chunks[coords] = self.read_chunk(coords)
+        return chunks
+
+    def close_map(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def close(self):
+        with self.lock:
+            self.close_map()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class SaoirseChunkStorage(ThreeDimensionalSpace.ChunkStorage):
+    def __init__(self, server):
+        self.server = server
+
+    def get_chunks_dir(self):
+        return ospath.join(self.server.get_save_dir(), "chunks")
+
+    def get_chunk_file(self, space, coords):
+        return ospath.join(self.get_chunks_dir(), space.get_id().get_file_path(), f"{coords[0]}_{coords[1]}_{coords[2]}.pkl")
+
+    def get_region_file(self, space, coords):
+        rx, ry, rz = SaoirseRegionFile.get_region_coords(coords)
+        return ospath.join(self.get_chunks_dir(), space.get_id().get_file_path(), f"r.{rx}.{ry}.{rz}.sreg")
+
+    def get_chunk_format(self):
+        return self.server.get_chunk_format()
+
+    def has_chunk(self, space, coords):
+        if self.server.get_region_file(self.get_region_file(space, coords)).has_chunk(SaoirseRegionFile.get_chunk_index(coords)):
+            return True
+        return self.get_chunk_format() == SaoirseServer.SaveFormats.PICKLE and ospath.isfile(self.get_chunk_file(space, coords))
+
+    def save_chunk(self, space, coords, objects_data):
+        if self.get_chunk_format() == SaoirseServer.SaveFormats.REGION:
+            return self.server.save_to_file(self.get_region_file(space, coords), {coords: objects_data}, save_format=SaoirseServer.SaveFormats.REGION)
+        return self.server.save_to_file(self.get_chunk_file(space, coords), objects_data, True)
+
+    def load_chunk(self, space, coords):
+        # Pickled chunk files are only read when pickle is the configured format, since unpickling a shared world's files can run code.
+        # Region files are always tried, so switching to pickle doesn't lose chunks saved before
+        loaders = [self.load_region_chunk]
+        if self.get_chunk_format() == SaoirseServer.SaveFormats.PICKLE:
+            loaders.insert(0, self.load_pickle_chunk)
+        for loader in loaders:
+            try:
+                objects_data = loader(space, coords)
+            except Exception as e:
+                logger.warning(f"Failed to read chunk {coords} of space {space.get_id()}: {e}")
+                objects_data = None
+            if objects_data is not None:
+                return objects_data
+        return None
+
+    def load_region_chunk(self, space, coords):
+        return self.server.load_from_file(self.get_region_file(space, coords), save_format=SaoirseServer.SaveFormats.REGION, chunk_coords=coords)
+
+    def load_pickle_chunk(self, space, coords):
+        return self.server.load_from_file(self.get_chunk_file(space, coords), True)
+
+
+class SaoirseSpaceStorage(BaseServer.SpaceStorage):
+    # One BinaryCodec record stream per space, next to the world file, so loading a space never unpickles anything
+    def __init__(self, server):
+        self.server = server
+
+    def get_spaces_dir(self):
+        return ospath.join(self.server.get_save_dir(), "spaces")
+
+    def get_space_file(self, space_key):
+        return ospath.join(self.get_spaces_dir(), f"{Identifier(space_key).get_file_path()}.sbin")
+
+    def has_space(self, server, space_key):
+        return ospath.isfile(self.get_space_file(space_key))
+
+    def save_space(self, server, space_key, records):
+        return self.server.write_binary_records_to_file(self.get_space_file(space_key), records)
+
+    def load_space(self, server, space_key):
+        if not self.has_space(server, space_key):
+            return None
+        return self.server.read_binary_record_stream(self.get_space_file(space_key))
+
+
 class SaoirseServer(BaseServer):
     @dataclass(frozen=True)
     class DataKeys:
@@ -331,17 +598,56 @@ class SaoirseServer(BaseServer):
         config_key = "config"
         max_tickrate_key = "max_tickrate"
         min_tickrate_key = "min_tickrate"
+        gravity_mode_key = "gravity_mode"
+        gravity_opening_angle_key = "gravity_opening_angle"
+        chunk_size_key = "chunk_size"
+        chunk_load_radius_key = "chunk_load_radius"
+        chunk_unload_timeout_key = "chunk_unload_timeout"
+        chunk_generation_workers_key = "chunk_generation_workers"
+        chunk_format_key = "chunk_format"
+        autosave_interval_key = "autosave_interval"
+        autosave_mode_key = "autosave_mode"
+        space_unload_timeout_key = "space_unload_timeout"
+        legacy_pickle_worlds_key = "legacy_pickle_worlds"
+        world_format_key = "world_format"
         last_version_key = "last_version"
+        world_stream_key = "saoirse_world_stream"
         save_dir_key = "%savedir%"
 
+    class SaveFormats(Enum):
+        JSON = "json"
+        PICKLE = "pickle"
+        REGION = "region"
+        BINARY = "binary"
+
+    class AutosaveModes(Enum):
+        THREAD = "thread"
+        FORK = "fork"
+
+    record_length_struct = Struct("<I")
+
     def __init__(self, save_file="world.pkl", config_file=f"{DataKeys.save_dir_key}/server_config.json"):
         self.set_current_tickrate(0)
 
         self.set_save_file(save_file)
         config_file = config_file.replace(self.DataKeys.save_dir_key, self.get_save_dir())
         self.set_config_file(config_file)
+        self.chunk_storage = SaoirseChunkStorage(self)
+        self.chunk_generator = None
+        self.region_files = {}
+        self.region_files_lock = RLock()
+        self.autosave_thread = None
+        self.autosave_pid = None
+        self.autosave_pipe = None
+        self.autosave_taken_chunks = []
+        self.autosave_failed_chunks = []
+        self.autosave_report = {}
+        self.autosave_saved = False
+        self.autosave_stats = {}
+        self.last_autosave_time = gettime()
 
         super().__init__(saoirse_id, SaoirseRegistry(self))
+        self.set_space_storage(SaoirseSpaceStorage(self))
 
         if ospath.isfile(self.get_config_file()):
             self.read_config_from_file()
@@ -349,6 +655,28 @@ class SaoirseServer(BaseServer):
             self.set_max_tickrate(64)
         if not hasattr(self, "min_tickrate"):
             self.set_min_tickrate(10)
+        if not hasattr(self, "gravity_mode"):
+            self.set_gravity_mode(ThreeDimensionalSpace.GravityModes.LEGACY)
+        if not hasattr(self, "gravity_opening_angle"):
+            self.set_gravity_opening_angle(0.5)
+        if not hasattr(self, "chunk_size"):
+            self.set_chunk_size(64)
+        if not hasattr(self, "chunk_load_radius"):
+            self.set_chunk_load_radius(2)
+        if not hasattr(self, "chunk_unload_timeout"):
+            self.set_chunk_unload_timeout(60)
+        if not hasattr(self, "chunk_generation_workers"):
+            self.set_chunk_generation_workers(2)
+        if not hasattr(self, "chunk_format"):
+            self.set_chunk_format(SaoirseServer.SaveFormats.REGION)
+        if not hasattr(self, "autosave_interval"):
+            self.set_autosave_interval(300)
+        if not hasattr(self, "autosave_mode"):
+            self.set_autosave_mode(SaoirseServer.AutosaveModes.THREAD)
+        if not hasattr(self, "legacy_pickle_worlds"):
+            self.set_legacy_pickle_worlds(False)
+        if not hasattr(self, "world_format"):
+            self.set_world_format(SaoirseServer.SaveFormats.BINARY)
 
         self.set_spawn_space(SaoirseRegistry.Identifiers.SPACES.normal.get_identifier())
         self.set_spawn_pos(ThreeDimensionalPosition(0, 0, 4000))
@@ -380,7 +708,7 @@ class SaoirseServer(BaseServer):
             player = self.get_registry().get_entry(SaoirseRegistry.Identifiers.ENTITIES.player.get_identifier()).get_obj()
             player.set_server(self)
             player.set_player_id(player_id)
-            if self.get_spawn_space_id().get_path_str() not in self.get_spaces_dict().keys():
+            if self.get_space(self.get_spawn_space_id()) is None:
                 self.generate_space(self.get_spawn_space_id())
             self.get_space(self.get_spawn_space_id()).add_obj_at_pos(player.get_pos(), player)
 
@@ -393,8 +721,9 @@ class SaoirseServer(BaseServer):
 
     def generate_space(self, space_ide):
         space = self.get_registry().get_entry(space_ide).get_obj()
-        space.generate_terrain_at_pos()
+        space.set_seed(getrandbits(63))
         self.add_space(space)
+        space.generate_chunk(space.get_chunk_coords(ThreeDimensionalPosition.get_origin()))
 
     def generate_spaces(self):
         for space_ide in [SaoirseRegistry.Identifiers.SPACES.normal, SaoirseRegistry.Identifiers.SPACES.ghostly]:
@@ -412,6 +741,172 @@ class SaoirseServer(BaseServer):
     def get_min_tickrate(self):
         return self.min_tickrate
 
+    def set_gravity_mode(self, mode):
+        if isinstance(mode, str):
+            mode = ThreeDimensionalSpace.GravityModes(mode)
+        self.gravity_mode = mode
+        for space in self.get_spaces():
+            space.set_gravity_mode(mode)
+
+    def get_gravity_mode(self):
+        return self.gravity_mode
+
+    def set_gravity_opening_angle(self, opening_angle):
+        self.gravity_opening_angle = opening_angle
+        for space in self.get_spaces():
+            space.set_gravity_opening_angle(opening_angle)
+
+    def get_gravity_opening_angle(self):
+        return self.gravity_opening_angle
+
+    def set_chunk_size(self, chunk_size):
+        # Spaces that already have chunks keep the size they were saved with
+        self.chunk_size = chunk_size
+        for space in self.get_spaces():
+            space.set_chunk_size(chunk_size)
+
+    def get_chunk_size(self):
+        return self.chunk_size
+
+    def set_chunk_load_radius(self, radius):
+        self.chunk_load_radius = radius
+        for space in self.get_spaces():
+            space.set_chunk_load_radius(radius)
+
+    def get_chunk_load_radius(self):
+        return self.chunk_load_radius
+
+    def set_chunk_unload_timeout(self, timeout):
+        self.chunk_unload_timeout = timeout
+        for space in self.get_spaces():
+            space.set_chunk_unload_timeout(timeout)
+
+    def get_chunk_unload_timeout(self):
+        return self.chunk_unload_timeout
+
+    def get_chunk_storage(self):
+        return self.chunk_storage
+
+    def set_chunk_generation_workers(self, workers):
+        # 0 generates chunks on the tick thread
+        self.chunk_generation_workers = workers
+        self.shutdown_chunk_generator()
+        for space in self.get_spaces():
+            space.set_chunk_generator(self.get_chunk_generator())
+            space.set_max_pending_chunks(self.get_max_pending_chunks())
+
+    def get_chunk_generation_workers(self):
+        return self.chunk_generation_workers
+
+    def get_max_pending_chunks(self):
+        # Enough to keep every worker busy with one more queued behind it
+        return max(1, 2 * getattr(self, "chunk_generation_workers", 2))
+
+    def set_chunk_format(self, chunk_format):
+        if isinstance(chunk_format, str):
+            chunk_format = SaoirseServer.SaveFormats(chunk_format)
+        if chunk_format == SaoirseServer.SaveFormats.JSON:
+            logger.warning("Chunks can't be saved as plain JSON files, using region files instead!")
+            chunk_format = SaoirseServer.SaveFormats.REGION
+        self.chunk_format = chunk_format
+
+    def get_chunk_format(self):
+        return self.chunk_format
+
+    def get_region_file(self, file_path):
+        # Region files stay open so chunks can be read and rewritten without reopening them
+        with self.region_files_lock:
+            region_file = self.region_files.get(file_path)
+            if region_file is None:
+                region_file = SaoirseRegionFile(file_path)
+                self.region_files[file_path] = region_file
+            return region_file
+
+    def sync_region_files(self):
+        with self.region_files_lock:
+            region_files = list(self.region_files.values())
+        for region_file in region_files:
+            region_file.sync()
+
+    def close_region_maps(self):
+        # Maps are remade on the next read, so they see records other processes appended
+        with self.region_files_lock:
+            region_files = list(self.region_files.values())
+        for region_file in region_files:
+            with region_file.lock:
+                region_file.close_map()
+
+    def close_region_files(self):
+        with self.region_files_lock:
+            for region_file in self.region_files.values():
+                region_file.close()
+            self.region_files.clear()
+
+    def set_autosave_interval(self, interval):
+        # Seconds between autosaves, 0 turns them off
+        self.autosave_interval = interval
+
+    def get_autosave_interval(self):
+        return self.autosave_interval
+
+    def set_autosave_mode(self, mode):
+        if isinstance(mode, str):
+            mode = SaoirseServer.AutosaveModes(mode)
+        if mode == SaoirseServer.AutosaveModes.FORK and not hasattr(os, "fork"):
+            logger.warning("Fork autosaves aren't supported on this platform, using thread autosaves instead!")
+            mode = SaoirseServer.AutosaveModes.THREAD
+        self.autosave_mode = mode
+
+    def get_autosave_mode(self):
+        return self.autosave_mode
+
+    def set_legacy_pickle_worlds(self, allowed):
+        # Pickled world files can run code when loaded, so saves from before worlds were written as BinaryCodec records are only read when this is on
+        self.legacy_pickle_worlds = bool(allowed)
+
+    def get_legacy_pickle_worlds(self):
+        return self.legacy_pickle_worlds
+
+    def set_world_format(self, world_format):
+        # Binary world files are the smallest, JSON ones can be read and edited by hand. Files in either format are read
+        # whatever this is set to, it only decides how the world file is written
+        if isinstance(world_format, str):
+            world_format = SaoirseServer.SaveFormats(world_format)
+        if world_format not in (SaoirseServer.SaveFormats.BINARY, SaoirseServer.SaveFormats.JSON):
+            logger.warning(f"World files can't be saved as {world_format.value} files, using binary files instead!")
+            world_format = SaoirseServer.SaveFormats.BINARY
+        self.world_format = world_format
+
+    def get_world_format(self):
+        return self.world_format
+
+    def get_chunk_generator(self):
+        # Worker processes are only started once the first chunk is queued
+        if self.chunk_generator is None and getattr(self, "chunk_generation_workers", 0) > 0:
+            self.chunk_generator = ProcessPoolExecutor(max_workers=self.get_chunk_generation_workers())
+        return self.chunk_generator
+
+    def shutdown_chunk_generator(self):
+        if self.chunk_generator is not None:
+            self.chunk_generator.shutdown(wait=False, cancel_futures=True)
+            self.chunk_generator = None
+
+    def add_space(self, space):
+        if hasattr(self, "gravity_mode"):
+            space.set_gravity_mode(self.get_gravity_mode())
+        if hasattr(self, "gravity_opening_angle"):
+            space.set_gravity_opening_angle(self.get_gravity_opening_angle())
+        if hasattr(self, "chunk_size"):
+            space.set_chunk_size(self.get_chunk_size())
+        if hasattr(self, "chunk_load_radius"):
+            space.set_chunk_load_radius(self.get_chunk_load_radius())
+        if hasattr(self, "chunk_unload_timeout"):
+            space.set_chunk_unload_timeout(self.get_chunk_unload_timeout())
+        space.set_chunk_storage(self.get_chunk_storage())
+        space.set_chunk_generator(self.get_chunk_generator())
+        space.set_max_pending_chunks(self.get_max_pending_chunks())
+        return super().add_space(space)
+
     def set_data(self, data):
         if self.DataKeys.world_key in data.keys():
             super().set_data(data.get(self.DataKeys.world_key))
@@ -421,9 +916,34 @@ class SaoirseServer(BaseServer):
                 self.set_max_tickrate(config.get(self.DataKeys.max_tickrate_key))
             if self.DataKeys.min_tickrate_key in config.keys():
                 self.set_min_tickrate(config.get(self.DataKeys.min_tickrate_key))
-
-    def get_world_data(self):
-        world_data = super().get_data()
+            if self.DataKeys.gravity_mode_key in config.keys():
+                self.set_gravity_mode(config.get(self.DataKeys.gravity_mode_key))
+            if self.DataKeys.gravity_opening_angle_key in config.keys():
+                self.set_gravity_opening_angle(config.get(self.DataKeys.gravity_opening_angle_key))
+            if self.DataKeys.chunk_size_key in config.keys():
+                self.set_chunk_size(config.get(self.DataKeys.chunk_size_key))
+            if self.DataKeys.chunk_load_radius_key in config.keys():
+                self.set_chunk_load_radius(config.get(self.DataKeys.chunk_load_radius_key))
+            if self.DataKeys.chunk_unload_timeout_key in config.keys():
+                self.set_chunk_unload_timeout(config.get(self.DataKeys.chunk_unload_timeout_key))
+            if self.DataKeys.chunk_generation_workers_key in config.keys():
+                self.set_chunk_generation_workers(config.get(self.DataKeys.chunk_generation_workers_key))
+            if self.DataKeys.chunk_format_key in config.keys():
+                self.set_chunk_format(config.get(self.DataKeys.chunk_format_key))
+            if self.DataKeys.autosave_interval_key in config.keys():
+                self.set_autosave_interval(config.get(self.DataKeys.autosave_interval_key))
+            if self.DataKeys.autosave_mode_key in config.keys():
+                self.set_autosave_mode(config.get(self.DataKeys.autosave_mode_key))
+            if self.DataKeys.space_unload_timeout_key in config.keys():
+                self.set_space_unload_timeout(config.get(self.DataKeys.space_unload_timeout_key))
+            if self.DataKeys.legacy_pickle_worlds_key in config.keys():
+                self.set_legacy_pickle_worlds(config.get(self.DataKeys.legacy_pickle_worlds_key))
+            if self.DataKeys.world_format_key in config.keys():
+                self.set_world_format(config.get(self.DataKeys.world_format_key))
+
+    def get_world_data(self, incremental=False):
+        # Incremental data leaves objects out and only writes the chunks that changed since the last save to chunk storage
+        world_data = super().get_incremental_data() if incremental else super().get_data()
         world_data[self.DataKeys.last_version_key] = saoirse_server_version
         return world_data
 
@@ -431,6 +951,18 @@ class SaoirseServer(BaseServer):
         return {
             self.DataKeys.max_tickrate_key: self.get_max_tickrate(),
             self.DataKeys.min_tickrate_key: self.get_min_tickrate(),
+            self.DataKeys.gravity_mode_key: self.get_gravity_mode().value,
+            self.DataKeys.gravity_opening_angle_key: self.get_gravity_opening_angle(),
+            self.DataKeys.chunk_size_key: self.get_chunk_size(),
+            self.DataKeys.chunk_load_radius_key: self.get_chunk_load_radius(),
+            self.DataKeys.chunk_unload_timeout_key: self.get_chunk_unload_timeout(),
+            self.DataKeys.chunk_generation_workers_key: self.get_chunk_generation_workers(),
+            self.DataKeys.chunk_format_key: self.get_chunk_format().value,
+            self.DataKeys.autosave_interval_key: self.get_autosave_interval(),
+            self.DataKeys.autosave_mode_key: self.get_autosave_mode().value,
+            self.DataKeys.space_unload_timeout_key: self.get_space_unload_timeout(),
+            self.DataKeys.legacy_pickle_worlds_key: self.get_legacy_pickle_worlds(),
+            self.DataKeys.world_format_key: self.get_world_format().value,
             self.DataKeys.last_version_key: saoirse_server_version,
         }
 
@@ -472,31 +1004,243 @@ class SaoirseServer(BaseServer):
     #    with open(self.get_save_file(), "r") as f:
     #        self.set_data(munpack(f))
 
-    def save_to_file(self, file_path, data, use_pkl=False):
-        if data is not None:
+    def get_save_format(self, use_pkl=False, save_format=None):
+        if save_format is None:
+            return SaoirseServer.SaveFormats.PICKLE if use_pkl else SaoirseServer.SaveFormats.JSON
+        return SaoirseServer.SaveFormats(save_format)
+
+    def save_to_file(self, file_path, data, use_pkl=False, save_format=None):
+        # Region files take a {chunk coords: chunk data} dict and only rewrite those chunks
+        # Returns whether the data was written
+        save_format = self.get_save_format(use_pkl, save_format)
+        if data is None:
+            return False
+        if save_format == SaoirseServer.SaveFormats.REGION:
             try:
-                file_dir = ospath.dirname(file_path)
-                if not ospath.isdir(file_dir):
-                    makedirs(file_dir)
-                if not ospath.isfile(file_path):
-                    mknod(file_path)
-                if use_pkl:
-                    with open(file_path, "wb") as f:
-                        pkldump(data, f)
-                else:
-                    with open(file_path, "w") as f:
-                        f.write(jdumps(data, indent=2))
+                region_file = self.get_region_file(file_path)
+                for coords, chunk_data in data.items():
+                    region_file.write_chunk(coords, chunk_data)
+                return True
             except Exception as e:
-                logger.warning(f"Failed to write save to file, the old file may have been written with broken data (see the following exception for more info, \"no such file or directory\" means no damage was done): {e}")
+                logger.warning(f"Failed to write chunks to region file {file_path}, chunks that were already in it are still readable: {e}")
+                return False
+        if save_format == SaoirseServer.SaveFormats.PICKLE:
+            return self.write_file_atomically(file_path, lambda f: pkldump(data, f))
+        if save_format == SaoirseServer.SaveFormats.BINARY:
+            return self.write_file_atomically(file_path, lambda f: f.write(BinaryCodec.encode(data)))
+        return self.write_file_atomically(file_path, lambda f: f.write(jdumps(data, indent=2)), False)
+
+    def write_file_atomically(self, file_path, write, binary=True):
+        # Writes to a temporary file next to the target and only swaps it in once it is fully on disk, so a crash
+        # part way through leaves the old file as it was
+        temp_file_path = f"{file_path}.tmp"
+        try:
+            file_dir = ospath.dirname(file_path)
+            if file_dir != "" and not ospath.isdir(file_dir):
+                makedirs(file_dir)
+            with open(temp_file_path, "wb" if binary else "w") as f:
+                write(f)
+                f.flush()
+                fsync(f.fileno())
+            osreplace(temp_file_path, file_path)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to write to file {file_path}, the old file was left intact: {e}")
+            if ospath.isfile(temp_file_path):
+                osremove(temp_file_path)
+            return False
 
     def save_world_to_file(self):
+        self.wait_for_autosave()
+        spaces_records = {space_key: self.iter_space_records(space_key, space, True) for space_key, space in self.get_spaces_dict().items()}
+        self.write_world_files(self.get_save_file(), [self.get_world_record()], spaces_records)
+
+    def write_world_files(self, file_path, world_records, spaces_records):
+        # Every loaded space goes to its own BinaryCodec file so it can be loaded by itself later, the world file is only replaced once they all are
+        # The world file is written in the world_format config format, nothing on this path is pickled
+        storage = self.get_space_storage()
+        failed_spaces = [space_key for space_key, records in spaces_records.items() if not storage.save_space(self, space_key, records)]
+        if len(failed_spaces) > 0:
+            logger.warning(f"Failed to save spaces {failed_spaces}, the world file was not replaced")
+            return False
+        return self.write_records_to_file(file_path, world_records)
+
+    def save_world_to_stream(self, file_path, incremental=True):
+        return self.write_records_to_file(file_path, self.iter_records(incremental))
+
+    def write_records_to_file(self, file_path, records):
+        # World files start with a (world_stream_key, version) header record, then the world and space records, in the world format
+        records = chain([(self.DataKeys.world_stream_key, saoirse_server_version)], records)
+        if self.get_world_format() == SaoirseServer.SaveFormats.JSON:
+            return self.write_json_records_to_file(file_path, records)
+        return self.write_binary_records_to_file(file_path, records)
+
+    def write_json_records_to_file(self, file_path, records):
+        # One JSON record per line
+        def write(f):
+            for record in records:
+                f.write(jdumps(record, separators=(",", ":")))
+                f.write("\n")
+        return self.write_file_atomically(file_path, write, False)
+
+    def write_binary_records_to_file(self, file_path, records):
+        # Each record is its own length prefixed BinaryCodec blob, so a generator never has to be turned into one big object
+        def write(f):
+            for record in records:
+                encoded = BinaryCodec.encode(record)
+                f.write(SaoirseServer.record_length_struct.pack(len(encoded)))
+                f.write(encoded)
+        return self.write_file_atomically(file_path, write)
+
+    def is_autosaving(self):
+        return (self.autosave_thread is not None and self.autosave_thread.is_alive()) or self.autosave_pid is not None
+
+    def can_unload_spaces(self):
+        # A running autosave could write an older copy of a space over the one written when unloading it
+        return super().can_unload_spaces() and not self.is_autosaving()
+
+    def take_world_snapshot(self, copy=True):
+        # Only in memory copies are made here, at a tick boundary, the slow part is left to write_world_snapshot
+        # A forked child already has its own copy of everything, so it skips them
+        chunks = []
+        for space in self.get_spaces():
+            for coords, objects_data in space.snapshot_dirty_chunks().items():
+                chunks.append((space, coords, deepcopy(objects_data) if copy else objects_data))
+        # Every dirty chunk was just taken, so this doesn't write any chunks itself
+        records = ([self.get_world_record()], {space_key: list(self.iter_space_records(space_key, space, True)) for space_key, space in self.get_spaces_dict().items()})
+        return chunks, deepcopy(records) if copy else records
+
+    def write_world_snapshot(self, snapshot, file_path):
+        start_time = gettime()
+        chunks, (world_records, spaces_records) = snapshot
+        storage = self.get_chunk_storage()
+        failed_chunks = [(space, coords) for space, coords, objects_data in chunks if not storage.save_chunk(space, coords, objects_data)]
+        self.sync_region_files()
+        if len(failed_chunks) > 0:
+            # The world file would list chunks that aren't stored, keep the old one
+            logger.warning(f"Failed to save {len(failed_chunks)} chunks, the world file was not replaced and they will be saved again next time")
+            saved = False
+        else:
+            saved = self.write_world_files(file_path, world_records, spaces_records)
+        self.autosave_failed_chunks = failed_chunks
+        self.autosave_report = {"write_time": gettime() - start_time, "chunks": len(chunks) - len(failed_chunks)}
+        # Thread autosaves can't return this, so finish_autosave reads it from here
+        self.autosave_saved = saved
+        return saved
+
+    def start_autosave(self):
+        if self.is_autosaving():
+            return False
+        self.autosave_start_time = gettime()
+        for space in self.get_spaces():
+            space.set_chunk_eviction_paused(True)
+        mode = self.get_autosave_mode()
+        if mode != SaoirseServer.AutosaveModes.FORK or not self.start_fork_autosave():
+            mode = SaoirseServer.AutosaveModes.THREAD
+            snapshot = self.take_world_snapshot()
+            self.autosave_saved = False
+            self.autosave_thread = Thread(target=self.write_world_snapshot, args=(snapshot, self.get_save_file()), daemon=True)
+            self.autosave_thread.start()
+        # How long the tick was held up by the snapshot
+        self.autosave_stats["mode"] = mode.value
+        self.autosave_stats["snapshot_time"] = gettime() - self.autosave_start_time
+        return True
+
+    def start_fork_autosave(self):
+        # Like Redis' BGSAVE, the child writes the world from its copy on write image of this process while the parent keeps ticking
+        try:
+            read_fd, write_fd = pipe()
+        except OSError as e:
+            logger.warning(f"Failed to fork for a snapshot save, saving from a thread instead: {e}")
+            return False
         try:
-            data = self.get_world_data() # Get data first to avoid writing a broken state to the save file
+            pid = os.fork()
+        except OSError as e:
+            logger.warning(f"Failed to fork for a snapshot save, saving from a thread instead: {e}")
+            osclose(read_fd)
+            osclose(write_fd)
+            return False
+        if pid == 0:
+            osclose(read_fd)
+            self.run_fork_autosave(write_fd)
+        osclose(write_fd)
+        self.autosave_pid = pid
+        self.autosave_pipe = read_fd
+        # The child saves the chunks that were dirty when it was forked, so they count as saved here too
+        self.autosave_taken_chunks = [(space, coords) for space in self.get_spaces() for coords in space.snapshot_dirty_chunks(False).keys()]
+        return True
+
+    def run_fork_autosave(self, write_fd):
+        # Runs in the forked child and never returns
+        status = 1
+        try:
+            # Open region files share their file offsets with the parent, so the child opens its own
+            self.region_files = {}
+            self.region_files_lock = RLock()
+            if self.write_world_snapshot(self.take_world_snapshot(False), self.get_save_file()):
+                status = 0
+            with fdopen(write_fd, "w") as f:
+                f.write(jdumps(self.autosave_report))
         except Exception as e:
-            data = None
-            logger.warning(f"Failed to write save to file, it will not be saved (the old save will still remain intact): {e}")
-        if data is not None:
-            self.save_to_file(self.get_save_file(), data, True)
+            logger.warning(f"Snapshot save process failed: {e}")
+        finally:
+            os._exit(status)
+
+    def finish_autosave(self, saved):
+        # Runs on the tick thread once the autosave is done
+        self.autosave_thread = None
+        for space, coords in self.autosave_failed_chunks:
+            space.mark_chunk_dirty(coords)
+        self.autosave_failed_chunks = []
+        for space in self.get_spaces():
+            space.set_chunk_eviction_paused(False)
+        self.autosave_stats.update(self.autosave_report)
+        self.autosave_stats["status"] = "saved" if saved else "failed"
+        self.autosave_stats["duration"] = gettime() - self.autosave_start_time
+        self.autosave_stats["count"] = self.autosave_stats.get("count", 0) + 1
+        self.autosave_report = {}
+
+    def finish_fork_autosave(self, wait_status):
+        try:
+            with fdopen(self.autosave_pipe, "r") as f:
+                report = f.read()
+            self.autosave_report = jloads(report) if report != "" else {}
+        except Exception as e:
+            logger.warning(f"Failed to read the report of the snapshot save process: {e}")
+            self.autosave_report = {}
+        saved = os.waitstatus_to_exitcode(wait_status) == 0
+        # The child may have moved records past the end of this process' maps
+        self.close_region_maps()
+        if not saved:
+            logger.warning("Snapshot save process failed, the chunks it was saving will be saved again next time")
+            self.autosave_failed_chunks = self.autosave_taken_chunks
+        self.autosave_pid = None
+        self.autosave_pipe = None
+        self.autosave_taken_chunks = []
+        self.finish_autosave(saved)
+
+    def wait_for_autosave(self):
+        if self.autosave_thread is not None:
+            self.autosave_thread.join()
+            self.finish_autosave(self.autosave_saved)
+        if self.autosave_pid is not None:
+            self.finish_fork_autosave(os.waitpid(self.autosave_pid, 0)[1])
+
+    def update_autosave(self, current_time):
+        if self.autosave_thread is not None and not self.autosave_thread.is_alive():
+            self.finish_autosave(self.autosave_saved)
+        if self.autosave_pid is not None:
+            pid, wait_status = os.waitpid(self.autosave_pid, os.WNOHANG)
+            if pid != 0:
+                self.finish_fork_autosave(wait_status)
+        interval = self.get_autosave_interval()
+        if interval > 0 and not self.is_autosaving() and current_time - self.last_autosave_time >= interval:
+            self.last_autosave_time = current_time
+            self.start_autosave()
+
+    def get_autosave_stats(self):
+        # mode, snapshot_time (tick time spent starting it), write_time, chunks, duration, status and count of the last autosave
+        return self.autosave_stats
 
     def save_config_to_file(self):
         try:
@@ -507,32 +1251,144 @@ class SaoirseServer(BaseServer):
         if data is not None:
             self.save_to_file(self.get_config_file(), data, False)
 
-    def read_data_from_file(self, file_path, use_pkl=False):
+    def load_from_file(self, file_path, use_pkl=False, save_format=None, chunk_coords=None):
+        # Region files only read the chunk at chunk_coords, or every chunk in the region as {chunk coords: chunk data} without it
+        save_format = self.get_save_format(use_pkl, save_format)
+        if save_format == SaoirseServer.SaveFormats.REGION:
+            region_file = self.get_region_file(file_path)
+            if not region_file.exists():
+                return None
+            if chunk_coords is not None:
+                return region_file.read_chunk(chunk_coords)
+            return region_file.read_chunks(self.get_region_coords_of_file(file_path))
+        if not ospath.isfile(file_path):
+            return None
+        if save_format == SaoirseServer.SaveFormats.PICKLE:
+            with open(file_path, "rb") as f:
+                return pklload(f)
+        if save_format == SaoirseServer.SaveFormats.BINARY:
+            with open(file_path, "rb") as f:
+                return BinaryCodec.decode(f.read())
+        with open(file_path, "r") as f:
+            return jloads(f.read())
+
+    def get_region_coords_of_file(self, file_path):
+        return tuple(int(coord) for coord in ospath.basename(file_path).split(".")[1:4])
+
+    def read_data_from_file(self, file_path, use_pkl=False, data_key=None, save_format=None):
         data = None
         try:
-            if ospath.isfile(file_path):
-                # Get data first to avoid reading a broken state from the save file
-                if use_pkl:
-                    with open(file_path, "rb") as f:
-                        data = pklload(f)
-                else:
-                    with open(file_path, "r") as f:
-                        data = jloads(f.read())
+            # Get data first to avoid reading a broken state from the save file
+            data = self.load_from_file(file_path, use_pkl, save_format)
+        except BinaryCodec.SchemaVersionError as e:
+            self.warn_schema_version_mismatch(file_path, e)
+            raise e
         except Exception as e:
-            logger.warning(f"Failed to load either the world or the config from file. The path that was failed to be read was: {file_path}  The server will NOT continue to load to avoid overwriting the existing file, please change the save path if a new level is desired and/or the config path if a new configuration is desired. The broken file might be fixable by hand as it is stored in plain JSON syntax")
+            fix_hint = " The broken file might be fixable by hand as it is stored in plain JSON syntax" if self.get_save_format(use_pkl, save_format) == SaoirseServer.SaveFormats.JSON else ""
+            logger.warning(f"Failed to load either the world or the config from file. The path that was failed to be read was: {file_path}  The server will NOT continue to load to avoid overwriting the existing file, please change the save path if a new level is desired and/or the config path if a new configuration is desired.{fix_hint}")
             raise e # The server should still crash to avoid overwriting the intended save
         if data is not None:
             if self.DataKeys.last_version_key in data.keys():
                 save_last_version = data.get(self.DataKeys.last_version_key)
                 if save_last_version != saoirse_server_version:
                     logger.warning(f"The server data saved in the file at {file_path} was last run using server version {save_last_version} but the current version is {saoirse_server_version}. This is probably fine, but be careful of incompatibilities.")
+            if data_key is not None:
+                data = {data_key: data}
             self.set_data(data)
 
+    def warn_schema_version_mismatch(self, file_path, error):
+        logger.warning(f"Could not load the file at {file_path}: {error}. It was probably written by a different server version, use that version or a matching one to load it. The server will NOT continue to load to avoid overwriting the existing file.")
+
     def read_world_from_file(self):
-        self.read_data_from_file(self.get_save_file(), True)
+        file_path = self.get_save_file()
+        if self.is_binary_record_stream(file_path):
+            self.read_world_from_stream(file_path, self.read_binary_record_stream(file_path))
+        elif self.is_json_record_stream(file_path):
+            self.read_world_from_stream(file_path, self.read_json_record_stream(file_path))
+        elif self.get_legacy_pickle_worlds():
+            # Saves from before worlds were written as BinaryCodec records, the next save converts them
+            if not self.read_world_from_pickle_stream(file_path):
+                self.read_data_from_file(file_path, True, self.DataKeys.world_key)
+        else:
+            logger.warning(f"The world file at {file_path} is an old pickle save. Pickle files can run code when loaded, so they are only read with {self.DataKeys.legacy_pickle_worlds_key} set to true in the server config, only do that for saves you trust. The server will NOT continue to load to avoid overwriting the existing file.")
+            raise ValueError(f"{file_path} is a pickle save and {self.DataKeys.legacy_pickle_worlds_key} is off")
+
+    def is_binary_record_stream(self, file_path):
+        with open(file_path, "rb") as f:
+            start = f.read(SaoirseServer.record_length_struct.size + len(BinaryCodec.magic))
+        return start[SaoirseServer.record_length_struct.size:] == BinaryCodec.magic
+
+    def is_json_record_stream(self, file_path):
+        # Pickle data never starts with a bracket
+        with open(file_path, "rb") as f:
+            return f.read(1) == b"["
+
+    def read_json_record_stream(self, file_path):
+        with open(file_path, "r") as f:
+            for line in f:
+                if not line.isspace():
+                    yield jloads(line)
+
+    def iter_stream_records(self, f):
+        while True:
+            try:
+                yield pklload(f)
+            except EOFError:
+                return
+
+    def read_binary_record_stream(self, file_path):
+        length_size = SaoirseServer.record_length_struct.size
+        with open(file_path, "rb") as f:
+            while True:
+                prefix = f.read(length_size)
+                if len(prefix) == 0:
+                    return
+                length = SaoirseServer.record_length_struct.unpack(prefix)[0] if len(prefix) == length_size else None
+                encoded = f.read(length) if length is not None else b""
+                if length is None or len(encoded) < length:
+                    logger.warning(f"{file_path} ends partway through a record, skipping the rest of it!")
+                    return
+                yield BinaryCodec.decode(encoded)
+
+    def read_world_from_stream(self, file_path, records):
+        try:
+            header = next(records, None)
+            # JSON files give the header back as a list
+            if not (isinstance(header, (tuple, list)) and len(header) == 2 and header[0] == self.DataKeys.world_stream_key):
+                raise ValueError(f"{file_path} does not start with a world stream header")
+            if header[1] != saoirse_server_version:
+                logger.warning(f"The server data saved in the file at {file_path} was last run using server version {header[1]} but the current version is {saoirse_server_version}. This is probably fine, but be careful of incompatibilities.")
+            self.set_data_from_records(records)
+        except BinaryCodec.SchemaVersionError as e:
+            self.warn_schema_version_mismatch(file_path, e)
+            raise e
+        except Exception as e:
+            logger.warning(f"Failed to load the world from file. The path that was failed to be read was: {file_path}  The server will NOT continue to load to avoid overwriting the existing file, please change the save path if a new level is desired.")
+            raise e # The server should still crash to avoid overwriting the intended save
+        return True
+
+    def read_world_from_pickle_stream(self, file_path):
+        # Returns False for pickle saves that aren't streams, those are read whole by read_data_from_file
+        if not ospath.isfile(file_path):
+            return False
+        try:
+            with open(file_path, "rb") as f:
+                header = pklload(f)
+                if not (isinstance(header, tuple) and len(header) == 2 and header[0] == self.DataKeys.world_stream_key):
+                    return False
+                if header[1] != saoirse_server_version:
+                    logger.warning(f"The server data saved in the file at {file_path} was last run using server version {header[1]} but the current version is {saoirse_server_version}. This is probably fine, but be careful of incompatibilities.")
+                self.set_data_from_records(self.iter_stream_records(f))
+        except Exception as e:
+            logger.warning(f"Failed to load the world from file. The path that was failed to be read was: {file_path}  The server will NOT continue to load to avoid overwriting the existing file, please change the save path if a new level is desired.")
+            raise e # The server should still crash to avoid overwriting the intended save
+        return True
+
+    def set_world_meta_data(self, data):
+        return self.set_data({self.DataKeys.world_key: data})
 
     def read_config_from_file(self):
-        self.read_data_from_file(self.get_config_file(), False)
+        self.read_data_from_file(self.get_config_file(), False, self.DataKeys.config_key)
 
     def read_from_file(self):
         self.read_config_from_file()
@@ -557,10 +1413,13 @@ class SaoirseServer(BaseServer):
                 if self.get_current_tickrate() < self.get_min_tickrate():
                     logger.warning(f"Server is ticking somewhat slowly, the last recorded rate was {self.get_current_tickrate()} ticks / second")
             self.last_time = current_time
+            self.update_autosave(current_time)
 
     def on_removed(self):
         self.save_world_to_file()
         self.save_config_to_file()
+        self.shutdown_chunk_generator()
+        self.close_region_files()
         super().on_removed()
 
 